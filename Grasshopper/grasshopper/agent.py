@@ -15,6 +15,7 @@ The agent also provides a web interface to view each scan of the network as foun
 __docformat__ = "reStructuredText"
 
 import asyncio
+import copy
 import json
 import logging
 import os
@@ -22,15 +23,17 @@ import re
 import signal
 import ssl
 import sys
-import traceback
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from multiprocessing import Process, Queue
-from typing import Any, Callable, Coroutine, Dict, List, Optional, cast
+from multiprocessing import Process, SimpleQueue
+from types import MappingProxyType
+from typing import Any, Callable, Coroutine, Dict, List, Mapping, Optional, Tuple, cast
 
-import gevent
 import uvicorn
 from bacpypes3.local.networkport import NetworkPortObject
-from bacpypes3.vendor import VendorInfo
+from bacpypes3.vendor import VendorInfo, get_vendor_info
 from fastapi import FastAPI
 from rdflib import Graph
 
@@ -39,16 +42,254 @@ from volttron.platform.agent import utils
 from volttron.platform.messaging.health import STATUS_BAD
 from volttron.platform.vip.agent import Agent, Core
 
-from .api import DEVICE_STATE_CONFIG, process_compare_rdf_queue
-from .bacpypes3_scanner import bacpypes3_scanner
+from .bacpypes3_scanner import BACnetApplicationCache, bacpypes3_scanner
+from .constants import DEVICE_STATE_CONFIG
+from .snapshots import parse_snapshot, same_triples, serialize_snapshot
 from .version import __version__
-from .web_app import create_app
+
+try:
+    import uvloop
+except ImportError:  # uvloop isn't available on Windows
+    uvloop = None  # type: ignore
 
 _log = logging.getLogger(__name__)
 utils.setup_logging()
 
 seconds_in_day: int = 86400
 
+# Timestamp used to name scan snapshots, e.g. 2024-05-01T13_45_00.ttl
+SNAPSHOT_TIME_FORMAT: str = "%Y-%m-%dT%H_%M_%S"
+
+# Matches snapshot filenames, including older ones written with ":" separators
+SNAPSHOT_FILENAME_RE: "re.Pattern[str]" = re.compile(
+    r"^\d{4}-\d{2}-\d{2}T\d{2}[:_]\d{2}[:_]\d{2}\.ttl$"
+)
+SNAPSHOT_FILENAME_LENGTH: int = len("2024-05-01T13_45_00.ttl")
+
+# uvicorn's default cipher string, used if the TLS 1.2 list can't be read
+DEFAULT_SSL_CIPHERS: str = "TLSv1"
+
+
+def read_tls12_ciphers() -> str:
+    """
+    Read the TLS 1.2 cipher suites supported by the OpenSSL build.
+
+    Runs at import, so a failure falls back to DEFAULT_SSL_CIPHERS rather than
+    stopping the agent module, and with it the BACnet scans, from loading.
+
+    Returns:
+        str: The TLS 1.2 cipher suites, joined for ssl_ciphers
+    """
+    try:
+        return ":".join(
+            cipher["name"]
+            for cipher in ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER).get_ciphers()
+            if cipher["protocol"] == "TLSv1.2"
+        )
+    except Exception as e:  # pylint: disable=broad-except
+        _log.warning("Could not read TLS 1.2 ciphers, using defaults: %s", e)
+        return DEFAULT_SSL_CIPHERS
+
+
+# TLS 1.2 cipher suites offered by the web server. The list only depends on the
+# OpenSSL build, so it is read once rather than on every server start.
+TLS12_CIPHERS: str = read_tls12_ciphers()
+
+# Seconds uvicorn waits for open requests after SIGINT before closing them, kept
+# under the time _stop_server allows before terminating the server process
+SERVER_SHUTDOWN_TIMEOUT_SECS: int = 3
+
+# How long onstop waits for the BACnet event loop to cancel a scan and to stop
+EVENT_LOOP_STOP_TIMEOUT_SECS: int = 5
+
+# Fallbacks for settings missing from the agent config. Read-only; copy before use.
+DEFAULT_BACPYPES_SETTINGS: Mapping[str, Any] = MappingProxyType(
+    {
+        "name": "Excelsior",
+        "instance": 999,
+        "network": 0,
+        "address": "192.168.1.12/24:47808",
+        "vendoridentifier": 999,
+        "foreign": None,
+        "ttl": 30,
+        "bbmd": None,
+    }
+)
+DEFAULT_WEBAPP_SETTINGS: Mapping[str, Any] = MappingProxyType(
+    {"host": "0.0.0.0", "port": 5000, "certfile": None, "keyfile": None}
+)
+
+# Parsed agent configs keyed by (absolute path, mtime in ns)
+CONFIG_CACHE_SIZE: int = 8
+_config_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+
+# Parsed TTL graphs kept per agent: base.ttl, the snapshot the last scan read and
+# the one it wrote
+GRAPH_CACHE_SIZE: int = 3
+
+
+def load_config_cached(config_path: str) -> Dict[str, Any]:
+    """
+    Load the agent configuration, reusing the parsed result while the file is unchanged.
+
+    The cache is keyed by the absolute path and modification time of the file and
+    holds at most CONFIG_CACHE_SIZE entries. Callers receive a copy so they can
+    mutate the result freely.
+
+    Args:
+        config_path (str): Path to a configuration file
+
+    Returns:
+        Dict[str, Any]: The parsed configuration
+    """
+    try:
+        key = (os.path.abspath(config_path), os.stat(config_path).st_mtime_ns)
+    except OSError:
+        config: Dict[str, Any] = utils.load_config(config_path)
+        return config
+
+    if key in _config_cache:
+        _config_cache.move_to_end(key)
+    else:
+        config = utils.load_config(config_path)
+        _config_cache[key] = config
+        if len(_config_cache) > CONFIG_CACHE_SIZE:
+            _config_cache.popitem(last=False)
+    return copy.deepcopy(_config_cache[key])
+
+
+def snapshot_key(filename: str) -> str:
+    """
+    Sort key for a snapshot filename, ordered as a plain string.
+
+    Args:
+        filename (str): A timestamped snapshot filename
+
+    Returns:
+        str: The filename with its time separators normalized
+    """
+    # Fixed width, zero padded timestamps sort lexicographically once the ":" and
+    # "_" separator forms are made the same
+    return filename.replace(":", "_")
+
+
+def is_snapshot_filename(filename: str) -> bool:
+    """
+    Check if a filename matches the timestamped TTL snapshot format.
+
+    Args:
+        filename (str): The filename to check
+
+    Returns:
+        bool: True if the name is a timestamped snapshot name
+    """
+    # Snapshot names are fixed width, so most other files fail on length
+    return (
+        len(filename) == SNAPSHOT_FILENAME_LENGTH
+        and SNAPSHOT_FILENAME_RE.match(filename) is not None
+    )
+
+
+def prune_snapshots(directory: str, limit: int) -> None:
+    """
+    Delete the oldest timestamped snapshots beyond the newest `limit`.
+
+    Every file with a snapshot name counts, including uploaded ones. base.ttl and
+    other files are left alone.
+
+    Args:
+        directory (str): The ttl directory
+        limit (int): Number of snapshots to keep
+
+    Returns:
+        None
+    """
+    with os.scandir(directory) as entries:
+        snapshots = [
+            entry.name
+            for entry in entries
+            if entry.is_file() and is_snapshot_filename(entry.name)
+        ]
+    snapshots.sort(key=snapshot_key, reverse=True)
+    for filename in snapshots[limit:]:
+        try:
+            os.remove(os.path.join(directory, filename))
+            _log.debug("Pruned graph snapshot %s", filename)
+        except OSError as e:
+            _log.error("Error pruning graph snapshot %s: %s", filename, e)
+
+
+def run_web_server(
+    host: str,
+    port: int,
+    ssl_context: Optional[Dict[str, str]],
+    agent_data_path: str,
+) -> int:
+    """
+    Serve the web app with uvicorn until the server shuts down.
+
+    This is the target of the agent's server process. It initializes the FastAPI
+    application and starts the Uvicorn server to serve it. It also sets up the task
+    queue and worker process for handling background tasks like RDF comparisons.
+    It only takes plain values, so starting the process never has to carry the
+    agent along, whichever start method multiprocessing uses.
+
+    Args:
+        host (str): The hostname or IP address to bind the server to
+        port (int): The port number to bind the server to
+        ssl_context (Optional[Dict[str, str]]): SSL certificate and key paths
+        agent_data_path (str): The agent data directory the web app serves
+
+    Returns:
+        int: 0 once the server has shut down
+    """
+    _log.debug("Running run_web_server")
+
+    # The web stack (pyvis, networkx) is only needed in the server process
+    from .api import process_compare_rdf_queue
+    from .web_app import create_app
+
+    # Create FastAPI app
+    app = create_app()
+    app.extra["agent_data_path"] = agent_data_path
+
+    config = uvicorn.Config(
+        app=app,  # type: ignore # FastAPI is a valid ASGI app but mypy doesn't know
+        host=host,
+        port=port,
+        ssl_certfile=ssl_context.get("certfile") if ssl_context else None,
+        ssl_keyfile=ssl_context.get("keyfile") if ssl_context else None,
+        ssl_version=ssl.PROTOCOL_TLSv1_2,
+        ssl_ciphers=TLS12_CIPHERS,
+        log_level="info",
+        # One log line per request, including every static asset, is only worth
+        # its cost when debugging
+        access_log=_log.isEnabledFor(logging.DEBUG),
+        # uvloop and httptools when installed (uvicorn[standard]), asyncio and
+        # h11 where they aren't, e.g. uvloop on Windows
+        loop="auto",
+        http="auto",
+        timeout_graceful_shutdown=SERVER_SHUTDOWN_TIMEOUT_SECS,
+    )
+    server = uvicorn.Server(config)
+
+    # Tasks are small dicts; SimpleQueue pickles them straight into the pipe
+    # without a feeder thread per queue
+    q: SimpleQueue = SimpleQueue()
+    processing_task_q: SimpleQueue = SimpleQueue()
+    app.state.task_queue = q
+    app.state.processing_task_queue = processing_task_q
+
+    worker = Process(target=process_compare_rdf_queue, args=(q, processing_task_q))
+    worker.daemon = True
+    worker.start()
+    _log.info("[serve_app] queue worker PID=%s", worker.pid)
+
+    server.run()
+
+    _log.debug("Running run_web_server complete")
+    return 0
+
 
 def grasshopper(config_path: str, **kwargs: Any) -> "Grasshopper":
     """
@@ -65,7 +306,7 @@ def grasshopper(config_path: str, **kwargs: Any) -> "Grasshopper":
         Grasshopper: An instance of the Grasshopper agent configured with the settings from config_path
     """
     try:
-        config: Dict[str, Any] = utils.load_config(config_path)
+        config: Dict[str, Any] = load_config_cached(config_path)
     except Exception:  # pylint: disable=broad-except
         # We need to catch any exception from load_config and provide defaults
         config = {}
@@ -82,22 +323,14 @@ def grasshopper(config_path: str, **kwargs: Any) -> "Grasshopper":
     device_broadcast_empty_step_size: int = config.get(
         "device_broadcast_empty_step_size", 1000
     )
+    graph_store_limit: Optional[int] = config.get("graph_store_limit", None)
     bacpypes_settings: Dict[str, Any] = config.get(
         "bacpypes_settings",
-        {
-            "name": "Excelsior",
-            "instance": 999,
-            "network": 0,
-            "address": "192.168.1.12/24:47808",
-            "vendoridentifier": 999,
-            "foreign": None,
-            "ttl": 30,
-            "bbmd": None,
-        },
+        dict(DEFAULT_BACPYPES_SETTINGS),
     )
     webapp_settings: Dict[str, Any] = config.get(
         "webapp_settings",
-        {"host": "0.0.0.0", "port": 5000, "certfile": None, "keyfile": None},
+        dict(DEFAULT_WEBAPP_SETTINGS),
     )
     return Grasshopper(
         scan_interval_secs,
@@ -107,6 +340,7 @@ def grasshopper(config_path: str, **kwargs: Any) -> "Grasshopper":
         device_broadcast_empty_step_size,
         bacpypes_settings,
         webapp_settings,
+        graph_store_limit,
         **kwargs,
     )
 
@@ -125,6 +359,7 @@ class Grasshopper(Agent):
         device_broadcast_empty_step_size: int = 1000,
         bacpypes_settings: Optional[Dict[str, Any]] = None,
         webapp_settings: Optional[Dict[str, Any]] = None,
+        graph_store_limit: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(enable_web=True, **kwargs)
@@ -136,25 +371,12 @@ class Grasshopper(Agent):
         self.high_limit: int = high_limit
         self.device_broadcast_full_step_size: int = device_broadcast_full_step_size
         self.device_broadcast_empty_step_size: int = device_broadcast_empty_step_size
+        self.graph_store_limit: Optional[int] = graph_store_limit
         if bacpypes_settings is None:
-            bacpypes_settings = {
-                "name": "Excelsior",
-                "instance": 999,
-                "network": 0,
-                "address": "192.168.1.12/24:47808",
-                "vendoridentifier": 999,
-                "foreign": None,
-                "ttl": 30,
-                "bbmd": None,
-            }
+            bacpypes_settings = dict(DEFAULT_BACPYPES_SETTINGS)
         self.bacpypes_settings: Dict[str, Any] = bacpypes_settings
         if webapp_settings is None:
-            webapp_settings = {
-                "host": "0.0.0.0",
-                "port": 5000,
-                "certfile": None,
-                "keyfile": None,
-            }
+            webapp_settings = dict(DEFAULT_WEBAPP_SETTINGS)
         self.webapp_settings: Dict[str, Any] = webapp_settings
         self.default_config: Dict[str, Any] = {
             "scan_interval_secs": scan_interval_secs,
@@ -162,13 +384,43 @@ class Grasshopper(Agent):
             "high_limit": high_limit,
             "device_broadcast_full_step_size": device_broadcast_full_step_size,
             "device_broadcast_empty_step_size": device_broadcast_empty_step_size,
+            "graph_store_limit": graph_store_limit,
             "bacpypes_settings": bacpypes_settings,
             "webapp_settings": webapp_settings,
         }
         self.http_server_process: Optional[Process] = None
         self.agent_data_path: str
+        self.ttl_dir: str
+        self.base_rdf_path: str
+        self.device_config_path: str
         self.app: Optional[FastAPI] = None
         self.vendor_info: Optional[VendorInfo] = None
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.event_loop_thread: Optional[threading.Thread] = None
+        self.scan_future: Optional["Future[Any]"] = None
+        # BACnet application reused across scans. Only touched on the loop thread.
+        self._bacnet_app: BACnetApplicationCache = BACnetApplicationCache()
+        self.applied_config: Optional[str] = None
+        # Single worker so snapshot writes and pruning land in scan order. Writes
+        # run in this process: handing the graph to another process means pickling
+        # every term here, which costs more than writing N-Triples directly.
+        self._writer: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="gh-writer"
+        )
+        # Parsed TTL graphs keyed by path, invalidated by the file's mtime and size.
+        # Filled from the writer thread as well, so guarded by a lock.
+        self._graph_cache: "OrderedDict[str, Tuple[Tuple[int, int], Graph]]" = (
+            OrderedDict()
+        )
+        self._graph_cache_lock: threading.Lock = threading.Lock()
+        # Newest snapshot filename in the ttl directory, keyed by the directory's
+        # mtime so files added or removed by the web app force a fresh listing
+        self._latest_snapshot: Optional[Tuple[int, Optional[str]]] = None
+        # Parsed device config, invalidated by the file's mtime and size. Each scan
+        # reads both the BBMDs and the subnets from it.
+        self._device_config_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = (
+            None
+        )
 
         # Set a default configuration to ensure that self.configure is called immediately to setup
         # the agent.
@@ -205,6 +457,16 @@ class Grasshopper(Agent):
         config.update(contents)
 
         if config_name == "config":
+            # The config store can re-send identical contents; reapplying them would
+            # restart the web server for nothing
+            config_key = json.dumps(contents, sort_keys=True, default=str)
+            if config_key == self.applied_config:
+                _log.debug("Config unchanged, skipping")
+                return
+
+            previous_interval = self.scan_interval_secs
+            previous_webapp_settings = self.webapp_settings
+            previous_bacpypes_settings = self.bacpypes_settings
             try:
                 self.scan_interval_secs = contents.get("scan_interval_secs", 86400)
                 self.low_limit = contents.get("low_limit", 0)
@@ -215,69 +477,78 @@ class Grasshopper(Agent):
                 self.device_broadcast_empty_step_size = contents.get(
                     "device_broadcast_empty_step_size", 1000
                 )
+                self.graph_store_limit = contents.get("graph_store_limit", None)
                 self.bacpypes_settings = contents.get(
                     "bacpypes_settings",
-                    {
-                        "name": "Excelsior",
-                        "instance": 999,
-                        "network": 0,
-                        "address": "192.168.1.12/24:47808",
-                        "vendoridentifier": 999,
-                        "foreign": None,
-                        "ttl": 30,
-                        "bbmd": None,
-                    },
+                    dict(DEFAULT_BACPYPES_SETTINGS),
                 )
                 self.webapp_settings = contents.get(
                     "webapp_settings",
-                    {
-                        "host": "0.0.0.0",
-                        "port": 5000,
-                        "certfile": None,
-                        "keyfile": None,
-                    },
+                    dict(DEFAULT_WEBAPP_SETTINGS),
                 )
 
-                self.configure_server_and_start()
+                # Only the web app settings reach the server, so other changes
+                # leave the running server alone
+                server = self.http_server_process
+                if (
+                    server is None
+                    or not server.is_alive()
+                    or self.webapp_settings != previous_webapp_settings
+                ):
+                    self._stop_server()
+                    self.configure_server_and_start()
 
                 vendorid: int = self.bacpypes_settings.get("vendoridentifier", 999)
-                if vendorid != 999:
-                    self.vendor_info = VendorInfo(vendorid)
-                    self.vendor_info.register_object_class(56, NetworkPortObject)
+                # bacpypes3 keeps vendors in a global registry that refuses to
+                # register the same identifier twice, so reuse an existing entry
+                if vendorid != 999 and (
+                    self.vendor_info is None
+                    or self.vendor_info.vendor_identifier != vendorid
+                ):
+                    vendor_info = get_vendor_info(vendorid)
+                    if vendor_info.vendor_identifier != vendorid:
+                        vendor_info = VendorInfo(vendorid)
+                        vendor_info.register_object_class(56, NetworkPortObject)
+                    self.vendor_info = vendor_info
+
+                # The cached BACnet application is bound with the old settings, so
+                # close it now on the loop thread; the next scan builds a new one
+                if (
+                    self.bacpypes_settings != previous_bacpypes_settings
+                    and self.event_loop is not None
+                    and not self.event_loop.is_closed()
+                ):
+                    asyncio.run_coroutine_threadsafe(
+                        self._close_bacnet(), self.event_loop
+                    )
 
             except ValueError as e:
                 _log.error("ERROR PROCESSING CONFIGURATION: %s", e)
                 return
 
-            if self.bacnet_analysis is not None:
-                self.bacnet_analysis.kill()  # pylint: disable=no-member
-            self.bacnet_analysis = self.core.periodic(
-                self.scan_interval_secs, self.who_is_broadcast
-            )
+            self.applied_config = config_key
+
+            # Rescheduling pushes the next scan out by a full interval, so leave the
+            # running schedule alone unless the interval itself changed
+            if (
+                self.bacnet_analysis is None
+                or previous_interval != self.scan_interval_secs
+            ):
+                if self.bacnet_analysis is not None:
+                    self.bacnet_analysis.kill()  # pylint: disable=no-member
+                self.bacnet_analysis = self.core.periodic(
+                    self.scan_interval_secs, self.who_is_broadcast
+                )
 
         _log.debug("Config completed")
 
-    def _grequests_exception_handler(self, request: Any, exception: Exception) -> None:
-        """
-        Log exceptions from grequests.
-
-        This method is used as a callback to handle exceptions that occur during
-        asynchronous HTTP requests made with the grequests library.
-
-        Args:
-            request (Any): The request object that caused the exception
-            exception (Exception): The exception that was raised
-
-        Returns:
-            None
-        """
-        _log.error("grequests error: %s with %s", exception, request)
-
     def _device_config_read_key(self, key: str) -> Optional[Any]:
         """
         Read a key from the device configuration file.
 
         This method loads the device configuration file and extracts the specified key.
+        The parsed file is kept until its mtime or size changes, and callers receive
+        a copy of the value.
 
         Args:
             key (str): The configuration key to read
@@ -290,17 +561,21 @@ class Grasshopper(Agent):
         """
         _log.debug("device_config_read_key")
         try:
-            config_path = os.path.join(self.agent_data_path, DEVICE_STATE_CONFIG)
-            if not os.path.exists(config_path):
-                _log.error("Config file not found: %s", config_path)
+            config_path = self.device_config_path
+            st = os.stat(config_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            cached = self._device_config_cache
+            if cached is not None and cached[0] == stamp:
+                config = cached[1]
+            else:
+                with open(config_path, "rb") as f:
+                    config = json.load(f)
+                self._device_config_cache = (stamp, config)
+            if key in config:
+                return copy.deepcopy(config[key])
+            else:
+                _log.error("Key %s not found in config", key)
                 return None
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                if key in config:
-                    return config[key]
-                else:
-                    _log.error("Key %s not found in config", key)
-                    return None
         except FileNotFoundError:
             _log.error("Config file not found: %s", config_path)
             return None
@@ -352,28 +627,169 @@ class Grasshopper(Agent):
             _log.error("Error config_retrieve_subnets: %s", ke)
             return []
 
+    def _cache_graph(self, path: str, graph: Graph) -> None:
+        """
+        Remember the graph parsed from, or written to, a TTL file.
+
+        Args:
+            path (str): Path of the TTL file
+            graph (Graph): The graph the file holds
+
+        Returns:
+            None
+        """
+        st = os.stat(path)
+        with self._graph_cache_lock:
+            self._graph_cache[path] = ((st.st_mtime_ns, st.st_size), graph)
+            self._graph_cache.move_to_end(path)
+            if len(self._graph_cache) > GRAPH_CACHE_SIZE:
+                self._graph_cache.popitem(last=False)
+
+    def _load_graph(self, path: str) -> Graph:
+        """
+        Parse a TTL file, reusing the cached graph while the file is unchanged.
+
+        The base graph and the previous snapshot rarely change between scans, and
+        the previous snapshot is usually the graph the last scan wrote, so most
+        scans need no parsing. The returned graph is shared and must not be
+        modified.
+
+        Args:
+            path (str): Path of the TTL file
+
+        Returns:
+            Graph: The parsed graph
+        """
+        st = os.stat(path)
+        with self._graph_cache_lock:
+            cached = self._graph_cache.get(path)
+            if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+                self._graph_cache.move_to_end(path)
+                return cached[1]
+
+        graph = parse_snapshot(Graph(), path)
+        self._cache_graph(path, graph)
+        return graph
+
+    async def _close_bacnet(self) -> None:
+        """
+        Cancel any scan still running, then close the BACnet application.
+
+        Runs on the BACnet event loop, so tasks started by the scan get to unwind
+        before the application is closed underneath them. Used when the agent
+        stops and when the bacpypes settings change.
+
+        Returns:
+            None
+        """
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._bacnet_app.close()
+
     def run_async_function(
         self, func: Callable[[Graph], Coroutine[Any, Any, Any]], graph: Graph
-    ) -> None:
+    ) -> "Future[Any]":
         """
-        Run an asynchronous function in a new event loop.
+        Schedule an asynchronous function on the agent's BACnet event loop.
 
-        This method creates a new asyncio event loop, runs the provided coroutine function
-        with the given graph as an argument, and ensures the loop is properly closed afterward.
+        bacpypes3 is asyncio based, so the coroutine runs on a dedicated loop in its
+        own thread instead of blocking the gevent hub until it completes. The loop is
+        started on first use and kept for the lifetime of the agent, so repeated
+        scans reuse it (and the BACnet application bound to it). It is stopped in
+        onstop. The loop is a uvloop loop where uvloop is installed.
 
         Args:
             func (Callable[[Graph], Coroutine[Any, Any, Any]]): An async function that takes a Graph argument
             graph (Graph): The RDF graph to pass to the async function
 
+        Returns:
+            Future[Any]: A future that resolves when the coroutine finishes
+        """
+        if self.event_loop is None or self.event_loop.is_closed():
+            new_event_loop = uvloop.new_event_loop if uvloop else asyncio.new_event_loop
+            self.event_loop = new_event_loop()
+            self.event_loop_thread = threading.Thread(
+                target=self.event_loop.run_forever, name="gh-bacnet", daemon=True
+            )
+            self.event_loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(func(graph), self.event_loop)
+
+    def _find_latest_snapshot(self, directory: str) -> Optional[str]:
+        """
+        Find the most recent timestamped TTL file in a directory.
+
+        Snapshots written since the directory last changed are recorded by
+        _write_snapshot, so the directory is only listed again after outside changes
+        such as uploads and deletes from the web app.
+
+        Args:
+            directory (str): The ttl directory
+
+        Returns:
+            Optional[str]: The newest snapshot filename, or None if there is none
+        """
+        dir_mtime = os.stat(directory).st_mtime_ns
+        latest = self._latest_snapshot
+        if latest is not None and latest[0] == dir_mtime:
+            return latest[1]
+
+        with os.scandir(directory) as entries:
+            valid_files = [
+                entry.name
+                for entry in entries
+                if entry.is_file() and is_snapshot_filename(entry.name)
+            ]
+
+        latest_file = max(valid_files, key=snapshot_key) if valid_files else None
+        self._latest_snapshot = (dir_mtime, latest_file)
+        return latest_file
+
+    def _write_snapshot(
+        self, graph: Graph, rdf_path: str, directory: str, limit: Optional[int]
+    ) -> None:
+        """
+        Serialize a scan graph to disk, then prune old snapshots.
+
+        Runs on the single writer thread. A stable network scans to the same graph,
+        so the write is skipped when the graph matches the newest snapshot. That
+        snapshot is looked up here rather than when the scan started, because an
+        earlier scan's write may still have been queued then.
+
+        Args:
+            graph (Graph): The scan graph
+            rdf_path (str): Path of the TTL file to write
+            directory (str): The ttl directory
+            limit (Optional[int]): Number of snapshots to keep, or None to keep all
+
         Returns:
             None
         """
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(func(graph))
-        finally:
-            loop.close()
+            latest_file = self._find_latest_snapshot(directory)
+            if latest_file is not None and same_triples(
+                graph, self._load_graph(os.path.join(directory, latest_file))
+            ):
+                _log.info("Network unchanged, not writing snapshot %s", rdf_path)
+                return
+
+            serialize_snapshot(graph, rdf_path)
+            # The next scan reads this snapshot back as its previous graph
+            self._cache_graph(rdf_path, graph)
+
+            # Only timestamp-named files are pruned; base.ttl and other files stay
+            if limit:
+                prune_snapshots(directory, limit)
+            # Pruning can only have removed it if the clock stepped back
+            if os.path.exists(rdf_path):
+                self._latest_snapshot = (
+                    os.stat(directory).st_mtime_ns,
+                    os.path.basename(rdf_path),
+                )
+        except Exception as e:  # pylint: disable=broad-except
+            _log.exception("Error writing graph snapshot %s: %s", rdf_path, e)
 
     def who_is_broadcast(self) -> None:
         """
@@ -383,7 +799,7 @@ class Grasshopper(Agent):
         It finds all responsive devices, constructs an RDF graph representation of the
         network topology, and saves the result as a timestamped TTL file.
 
-        The method uses helper functions defined within it to handle file operations and
+        The snapshot is written on the writer thread once the scan finishes. The method
         includes error handling to prevent crashes during the scanning process.
 
         Returns:
@@ -391,51 +807,30 @@ class Grasshopper(Agent):
         """
         _log.debug("who_is_broadcast")
 
-        def extract_datetime(filename: str) -> datetime:
-            """Convert a timestamped filename to a datetime object."""
-            datetime_str = filename.replace(".ttl", "")
-            return datetime.fromisoformat(datetime_str)
-
-        def is_valid_filename(filename: str) -> bool:
-            """Check if a filename matches the timestamped TTL format."""
-            pattern = r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.ttl$"
-            return bool(re.match(pattern, filename))
-
-        def find_latest_file(directory: str) -> Optional[str]:
-            """Find the most recent timestamped TTL file in a directory."""
-            files = [
-                f
-                for f in os.listdir(directory)
-                if os.path.isfile(os.path.join(directory, f))
-            ]
-            valid_files = [f for f in files if is_valid_filename(f)]
-
-            if not valid_files:
-                return None
-
-            latest_file = max(valid_files, key=extract_datetime)
-            return latest_file
-
         try:
             if self.agent_data_path is None:
                 _log.error("Agent data path is not set")
                 return
 
-            base_rdf_path = os.path.join(self.agent_data_path, "ttl/base.ttl")
-            recent_ttl_file = find_latest_file(
-                os.path.join(self.agent_data_path, "ttl")
-            )
+            # The BACnet application is shared, so scans must not overlap
+            if self.scan_future is not None and not self.scan_future.done():
+                _log.warning("Previous scan still running, skipping this one")
+                return
+
+            base_rdf_path = self.base_rdf_path
+            recent_ttl_file = self._find_latest_snapshot(self.ttl_dir)
 
             prev_graph: Graph = Graph()
             graph: Graph = Graph()
 
             if os.path.exists(base_rdf_path):
-                graph.parse(base_rdf_path, format="ttl")
+                # The scan adds to its graph, so it gets a copy of the shared base
+                base_graph = self._load_graph(base_rdf_path)
+                graph.addN((s, p, o, graph) for s, p, o in base_graph)
 
             if recent_ttl_file:
-                prev_graph.parse(
-                    os.path.join(self.agent_data_path, f"ttl/{recent_ttl_file}"),
-                    format="ttl",
+                prev_graph = self._load_graph(
+                    os.path.join(self.ttl_dir, recent_ttl_file)
                 )
 
             now = datetime.now()
@@ -451,25 +846,41 @@ class Grasshopper(Agent):
                 self.device_broadcast_full_step_size,
                 self.low_limit,
                 self.high_limit,
+                app_cache=self._bacnet_app,
             )
-            # This is a wrapper that returns None, but gevent.spawn expects a callable
-            # Using type ignore as this is a valid pattern even though the types don't
-            # align perfectly
-            # Spawn a task to run the async function
-            gevent.spawn(
-                self.run_async_function(scanner.get_device_and_router, graph)  # type: ignore
-            )  # type: ignore
-
             rdf_path = os.path.join(
-                self.agent_data_path,
-                f"ttl/{now.replace(microsecond=0).isoformat().replace(':','_')}.ttl",
+                self.ttl_dir, f"{now.strftime(SNAPSHOT_TIME_FORMAT)}.ttl"
             )
-            os.makedirs(os.path.dirname(rdf_path), exist_ok=True)
-            graph.serialize(destination=rdf_path, format="turtle")
+            ttl_dir = self.ttl_dir
+            graph_store_limit = self.graph_store_limit
+
+            def on_scan_done(future: "Future[Any]") -> None:
+                """Queue the snapshot write once the scan has filled in the graph."""
+                if future.cancelled():
+                    _log.info("who_is_broadcast scan cancelled")
+                    return
+                error = future.exception()
+                if error is not None:
+                    # Not raised here, so the traceback is passed to the logger
+                    _log.error(
+                        "Error in who_is_broadcast scan: %s", error, exc_info=error
+                    )
+                    return
+                self._writer.submit(
+                    self._write_snapshot,
+                    graph,
+                    rdf_path,
+                    ttl_dir,
+                    graph_store_limit,
+                )
+
+            self.scan_future = self.run_async_function(
+                scanner.get_device_and_router, graph
+            )
+            self.scan_future.add_done_callback(on_scan_done)
         except Exception as e:  # pylint: disable=broad-except
             # We need to catch any exception during broadcast to prevent crash
-            _log.error("Error in who_is_broadcast: %s", e)
-            _log.error(traceback.format_exc())
+            _log.exception("Error in who_is_broadcast: %s", e)
 
     def configure_server_and_start(self) -> None:
         """
@@ -477,7 +888,6 @@ class Grasshopper(Agent):
 
         This method sets up the FastAPI web server with the current configuration
         settings and starts it in a separate process. It handles:
-        - Creating necessary directories
         - Setting up SSL/TLS if certificates are provided
         - Starting the server in a new process
         - Setting up error handling
@@ -487,16 +897,6 @@ class Grasshopper(Agent):
         """
         _log.debug("configure_server_setup")
 
-        def ensure_folders_exist(agent_data_path: str, folder_names: List[str]) -> None:
-            """Create necessary folders in the agent data directory if they don't exist."""
-            for folder in folder_names:
-                folder_path = os.path.join(agent_data_path, folder)
-                if not os.path.exists(folder_path):
-                    os.makedirs(folder_path)
-                    print(f"Folder '{folder}' created.")
-                else:
-                    print(f"Folder '{folder}' already exists.")
-
         # Create cert/key files
         certfile = self.webapp_settings.get("certfile")
         keyfile = self.webapp_settings.get("keyfile")
@@ -507,7 +907,7 @@ class Grasshopper(Agent):
             try:
                 ssl_context = {"certfile": certfile, "keyfile": keyfile}
             except Exception as e:
-                print(f"Failed to setup ssl_context: {e}")
+                _log.error("Failed to setup ssl_context: %s", e)
                 raise
 
         # Start FastAPI with uvicorn
@@ -516,11 +916,13 @@ class Grasshopper(Agent):
 
         try:
             self.http_server_process = Process(
-                target=self._start_server, args=(host, port, ssl_context), daemon=False
+                target=run_web_server,
+                args=(host, port, ssl_context, self.agent_data_path),
+                daemon=False,
             )
             self.http_server_process.start()
 
-            _log.info(f"[Agent] Starting Uvicorn PID {self.http_server_process.pid}")
+            _log.info("[Agent] Starting Uvicorn PID %s", self.http_server_process.pid)
         except Exception as e:  # pylint: disable=broad-except
             # We need to catch any server errors to properly set status
             _log.error("Error starting server: %s", e)
@@ -529,19 +931,15 @@ class Grasshopper(Agent):
 
         if not self.http_server_process.is_alive():
             code = self.http_server_process.exitcode
-            _log.error(f"Uvicorn process died immediately with exit code {code}")
+            _log.error("Uvicorn process died immediately with exit code %s", code)
         else:
-            _log.info(f"Server is alive, running on {host}:{port}")
+            _log.info("Server is alive, running on %s:%s", host, port)
 
     def _start_server(
         self, host: str, port: int, ssl_context: Optional[Dict[str, str]] = None
     ) -> int:
         """
-        Start the uvicorn server in a separate thread.
-
-        This method initializes the FastAPI application and starts the Uvicorn server
-        to serve it. It also sets up the task queue and worker process for handling
-        background tasks like RDF comparisons.
+        Start the uvicorn server for this agent's data path.
 
         Args:
             host (str): The hostname or IP address to bind the server to
@@ -550,53 +948,9 @@ class Grasshopper(Agent):
                 Defaults to None.
 
         Returns:
-            int: 0 on success, -1 on failure
+            int: 0 once the server has shut down
         """
-        _log.debug("Running _start_server")
-
-        # Create FastAPI app
-        app = create_app()
-        app.extra["agent_data_path"] = self.agent_data_path
-        self.app = app
-
-        _ctx = ssl.SSLContext(
-            ssl.PROTOCOL_TLS
-        )  # PROTOCOL_TLS = “best default” (formerly SSLv23)
-        _all = _ctx.get_ciphers()
-        tls12_ciphers = ":".join(
-            [c["name"] for c in _all if c["protocol"] == "TLSv1.2"]
-        )
-
-        if self.app is None:
-            _log.error("FastAPI app is not initialized")
-            return -1
-
-        config = uvicorn.Config(
-            app=self.app,  # type: ignore # FastAPI is a valid ASGI app but mypy doesn't know
-            host=host,
-            port=port,
-            ssl_certfile=ssl_context.get("certfile") if ssl_context else None,
-            ssl_keyfile=ssl_context.get("keyfile") if ssl_context else None,
-            ssl_version=ssl.PROTOCOL_TLSv1_2,
-            ssl_ciphers=tls12_ciphers,
-            log_level="info",
-        )
-        server = uvicorn.Server(config)
-
-        q: Queue = Queue()
-        processing_task_q: Queue = Queue()
-        app.state.task_queue = q
-        app.state.processing_task_queue = processing_task_q
-
-        worker = Process(target=process_compare_rdf_queue, args=(q, processing_task_q))
-        worker.daemon = True
-        worker.start()
-        print(f"[serve_app] queue worker PID={worker.pid}")
-
-        server.run()
-
-        _log.debug("Running _start_server complete")
-        return 0
+        return run_web_server(host, port, ssl_context, self.agent_data_path)
 
     def _stop_server(self) -> None:
         """
@@ -611,14 +965,17 @@ class Grasshopper(Agent):
         """
         _log.debug("Running _stop_server")
         if self.http_server_process and self.http_server_process.is_alive():
-            print(f"[Agent] Terminating Uvicorn PID {self.http_server_process.pid}")
+            _log.info(
+                "[Agent] Terminating Uvicorn PID %s", self.http_server_process.pid
+            )
             # Send SIGINT for a clean shutdown, or SIGTERM if you prefer
             if isinstance(self.http_server_process.pid, int):
                 os.kill(self.http_server_process.pid, signal.SIGINT)
-            # Give it a moment to exit gracefully...
-            self.http_server_process.join(timeout=5)
+            # Uvicorn stops accepting and drains open requests for at most
+            # SERVER_SHUTDOWN_TIMEOUT_SECS; join returns as soon as it exits
+            self.http_server_process.join(timeout=SERVER_SHUTDOWN_TIMEOUT_SECS + 2)
             if self.http_server_process.is_alive():
-                print("[Agent] Uvicorn did not exit; killing")
+                _log.warning("[Agent] Uvicorn did not exit; killing")
                 self.http_server_process.terminate()
                 self.http_server_process.join(timeout=2)
         _log.debug("Running _stop_server complete")
@@ -669,10 +1026,19 @@ class Grasshopper(Agent):
         agent_data_path = get_agent_data_path(current_dir)
         self.agent_data_path = agent_data_path
 
-        device_config_path = os.path.join(self.agent_data_path, DEVICE_STATE_CONFIG)
-        if not os.path.exists(device_config_path):
-            _log.info("Creating device config file: %s", device_config_path)
-            with open(device_config_path, "w", encoding="utf-8") as f:
+        # Scan snapshots, comparison results and uploaded network configs are
+        # written under the agent data path, so create the tree once here
+        self.ttl_dir = os.path.join(self.agent_data_path, "ttl")
+        self.base_rdf_path = os.path.join(self.ttl_dir, "base.ttl")
+        for folder in ("ttl", "compare", "network_config"):
+            os.makedirs(os.path.join(self.agent_data_path, folder), exist_ok=True)
+
+        self.device_config_path = os.path.join(
+            self.agent_data_path, DEVICE_STATE_CONFIG
+        )
+        if not os.path.exists(self.device_config_path):
+            _log.info("Creating device config file: %s", self.device_config_path)
+            with open(self.device_config_path, "w", encoding="utf-8") as f:
                 json.dump(
                     {"bbmd_devices": [], "subnets": []},
                     f,
@@ -680,7 +1046,7 @@ class Grasshopper(Agent):
                     ensure_ascii=False,
                 )
         else:
-            _log.info("Device config file already exists: %s", device_config_path)
+            _log.info("Device config file already exists: %s", self.device_config_path)
 
         # Sets WEB_ROOT to be the path to the webroot directory
         # in the agent-data directory of the installed agent.
@@ -708,6 +1074,29 @@ class Grasshopper(Agent):
         # Stop the web server
         self._stop_server()
 
+        # Release the BACnet sockets held between scans. The application belongs to
+        # the loop thread, so it is closed there before the loop is stopped.
+        if self.event_loop is not None and not self.event_loop.is_closed():
+            if self.scan_future is not None and not self.scan_future.done():
+                self.scan_future.cancel()
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    self._close_bacnet(), self.event_loop
+                ).result(timeout=EVENT_LOOP_STOP_TIMEOUT_SECS)
+            except TimeoutError:
+                _log.error("Timed out cancelling the running scan")
+            self.event_loop.call_soon_threadsafe(self.event_loop.stop)
+            if self.event_loop_thread is not None:
+                self.event_loop_thread.join(timeout=EVENT_LOOP_STOP_TIMEOUT_SECS)
+                if self.event_loop_thread.is_alive():
+                    _log.error("BACnet event loop thread did not stop, leaving it open")
+            if not self.event_loop.is_running():
+                self.event_loop.close()
+        else:
+            self._bacnet_app.close()
+        # Let queued snapshot writes finish so no completed scan is lost
+        self._writer.shutdown(wait=True)
+
 
 def main() -> None:
     """
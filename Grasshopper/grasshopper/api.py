@@ -2,23 +2,37 @@
 
 import csv
 import json
+import logging
 import os
+import time
 import uuid
+from collections import OrderedDict
 from concurrent.futures import ProcessPoolExecutor
 from http import HTTPStatus
 from io import BytesIO, StringIO
-from multiprocessing import Queue
-from typing import Any, Dict, List, Optional, Union, cast
+from multiprocessing.queues import SimpleQueue
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 import gevent
 from bacpypes3.rdf.core import BACnetNS
 from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from pyvis.edge import Edge
 from pyvis.network import Network
 from rdflib import Graph, Literal, Namespace  # type: ignore
-from rdflib.compare import graph_diff, to_isomorphic
-from rdflib.extras.external_graph_libs import rdflib_to_networkx_digraph
 
+from .constants import DEVICE_STATE_CONFIG
 from .rdf_components import BACnetEdgeType
 from .serializers import (
     CompareTTLFiles,
@@ -29,8 +43,36 @@ from .serializers import (
     IPAddressList,
     MessageResponse,
 )
+from .snapshots import parse_snapshot
+
+_log = logging.getLogger(__name__)
+
+# Directory listings keyed by (path, suffix), invalidated by the directory mtime
+_listdir_cache: Dict[Tuple[str, str], Tuple[int, List[str]]] = {}
+
+# Listings of directories modified more recently than this aren't cached, since a
+# coarse-grained mtime may not change for an entry added in the same clock tick
+LISTDIR_RACY_WINDOW_NS: int = 2_000_000_000
+
+# Rendered network JSON keyed by TTL path, invalidated by the file's mtime and size
+NETWORK_CACHE_SIZE: int = 16
+_network_cache: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+
+# Canonical graphs for the compare worker, keyed by TTL path and invalidated by
+# the file's mtime and size
+CANONICAL_CACHE_SIZE: int = 8
+_canonical_cache: "OrderedDict[str, Tuple[Tuple[int, int], Graph]]" = OrderedDict()
+
+# Predicate local names that build_networkx_graph keeps as graph edges
+EDGE_TYPE_NAMES: FrozenSet[str] = frozenset(edge.value for edge in BACnetEdgeType)
+
+
+class NetworkGraph(NamedTuple):
+    """Nodes and labelled (u, v, label) edges of a BACnet network graph"""
+
+    nodes: List[Any]
+    edges: List[Tuple[Any, Any, Any]]
 
-DEVICE_STATE_CONFIG: str = "device_config.json"
 
 # Create FastAPI router
 api_router = APIRouter(prefix="/operations", tags=["operations"])
@@ -55,7 +97,7 @@ def get_task_queue(request: Request) -> Any:
         request (Request): The FastAPI request object
 
     Returns:
-        Queue[Any]: The multiprocessing queue for tasks
+        SimpleQueue[Any]: The multiprocessing queue for tasks
     """
     return request.app.state.task_queue
 
@@ -67,12 +109,14 @@ def get_processing_task(request: Request) -> Any:
         request (Request): The FastAPI request object
 
     Returns:
-        Queue[Any]: The multiprocessing queue for tasks currently being processed
+        SimpleQueue[Any]: The multiprocessing queue for tasks currently being processed
     """
     return request.app.state.processing_task_queue
 
 
-def process_compare_rdf_queue(task_queue: Queue, processing_task_queue: Queue) -> None:
+def process_compare_rdf_queue(
+    task_queue: SimpleQueue, processing_task_queue: SimpleQueue
+) -> None:
     """Process the compare RDF queue in background.
 
     This function runs as a separate process and continually processes tasks from the queue.
@@ -84,8 +128,8 @@ def process_compare_rdf_queue(task_queue: Queue, processing_task_queue: Queue) -
     5. Serializes the combined graph to a new TTL file
 
     Args:
-        task_queue (Queue): Queue containing tasks to be processed
-        processing_task_queue (Queue): Queue for tracking tasks currently being processed
+        task_queue (SimpleQueue): Queue containing tasks to be processed
+        processing_task_queue (SimpleQueue): Queue for tracking tasks currently being processed
 
     Returns:
         None: This function runs indefinitely until the process is terminated
@@ -99,10 +143,7 @@ def process_compare_rdf_queue(task_queue: Queue, processing_task_queue: Queue) -
             ttl_filename_1 = task.get("ttl_1")
             ttl_filename_2 = task.get("ttl_2")
             agent_data_path = task.get("agent_data_path")
-            print(f"{task=}")
-            print(
-                f"task ttl1 get {task.get('ttl_1')} and task ttl2 get {task.get('ttl_2')}"
-            )
+            _log.debug("Comparing %s with %s", ttl_filename_1, ttl_filename_2)
             ttl_filepath_1 = os.path.join(agent_data_path, f"ttl/{ttl_filename_1}")
             ttl_filepath_2 = os.path.join(agent_data_path, f"ttl/{ttl_filename_2}")
             if not os.path.exists(ttl_filepath_1):
@@ -115,17 +156,15 @@ def process_compare_rdf_queue(task_queue: Queue, processing_task_queue: Queue) -
                     f"The file '{ttl_filename_2}' does not exist in the current directory."
                 )
 
-            g1 = Graph()
-            g2 = Graph()
-            g1.parse(ttl_filepath_1, format="ttl")
-            g2.parse(ttl_filepath_2, format="ttl")
+            # Canonical graphs give an accurate comparison
+            canonical_g1 = load_canonical_graph(ttl_filepath_1)
+            canonical_g2 = load_canonical_graph(ttl_filepath_2)
 
-            # Convert to isomorphic graphs for accurate comparison
-            iso_g1 = to_isomorphic(g1)
-            iso_g2 = to_isomorphic(g2)
-
-            # Get differences between graphs
-            in_both, in_first, in_second = graph_diff(iso_g1, iso_g2)
+            # Get differences between graphs, as rdflib's graph_diff does but
+            # without canonicalizing both graphs again on every comparison
+            in_both = canonical_g1 * canonical_g2
+            in_first = canonical_g1 - canonical_g2
+            in_second = canonical_g2 - canonical_g1
 
             combined_graph = Graph()
 
@@ -158,53 +197,59 @@ def process_compare_rdf_queue(task_queue: Queue, processing_task_queue: Queue) -
             # Mark task as complete
             processing_task_queue.get()
         except Exception as e:
-            print(f"Error processing task: {e}")
+            _log.error("Error processing task: %s", e)
 
 
 def build_networkx_graph(g: Graph):
     """
-    Build a networkx graph from the BACnet RDF graph.
+    Build the network graph from the BACnet RDF graph.
 
-    This function converts an RDFLib graph to a NetworkX graph that can be used
-    for visualization and network analysis. It also extracts node and edge attributes
-    for display in the UI.
+    This function reduces an RDFLib graph to the nodes and labelled edges that are
+    displayed in the UI, and extracts node and edge attributes for display. The
+    graph is kept as plain lists rather than a NetworkX graph since consumers only
+    iterate it once.
 
     Args:
         g (Graph): The RDFLib graph containing BACnet network information
 
     Returns:
         tuple: Contains:
-            - nx_graph: The NetworkX graph object
+            - graph: The NetworkGraph with the displayed nodes and edges
             - node_data: Dictionary of node attributes
             - edge_data: Dictionary of edge attributes
 
     Note: device_address_edges is utilized to deal with Bacpypes3 original format, however it is no longer utilized.
     This is utilized for backward compatibility support. It may be removed in the future.
     """
-    nx_graph = rdflib_to_networkx_digraph(g)
-
-    is_directed = nx_graph.is_directed()
-    print(f"Is the graph directed? {is_directed}")
-
-    remove_nodes: List[Any] = []
+    remove_nodes: Set[Any] = set()
     rdf_edges: Dict[Any, Any] = {}
     device_address_edges: List[Any] = []
     rdf_diff_list: List[Any] = []
     node_data: Dict[str, Dict[str, Any]] = {}
     edge_data: Dict[str, Dict[str, Any]] = {}
-    for u, v, attr in nx_graph.edges(data=True):
-        edge_label = attr.get("triples", [])[0][1] if "triples" in attr else None
-        if edge_label:
-            if "rdf_diff_source" in edge_label:
-                rdf_diff_list.append((u, v, edge_label))
-            elif all(edge.value not in edge_label for edge in BACnetEdgeType):
-                label = edge_label.split("#")[-1]
-                val = str(v).split("#")[-1]
-                if str(u) in node_data:
-                    node_data[str(u)][label] = val
-                else:
-                    node_data[str(u)] = {label: val}
-                remove_nodes.append(v)
+
+    # Single pass over the triples. Each (subject, object) pair becomes one edge
+    # labelled and classified by its first predicate when first seen. Property and
+    # diff marker nodes are only collected here, never added to the graph.
+    nodes: Dict[Any, None] = {}
+    edges: Dict[Tuple[Any, Any], Any] = {}
+    for s, p, o in g:
+        if (s, o) in edges:
+            continue
+        edges[(s, o)] = p
+        nodes[s] = None
+        nodes[o] = None
+
+        label = str(p).split("#")[-1]
+        if label == "rdf_diff_source":
+            rdf_diff_list.append((s, o, p))
+        elif label not in EDGE_TYPE_NAMES:
+            val = str(o).split("#")[-1]
+            if str(s) in node_data:
+                node_data[str(s)][label] = val
+            else:
+                node_data[str(s)] = {label: val}
+            remove_nodes.add(o)
 
     for u, v in device_address_edges:
         if str(u) in node_data:
@@ -220,40 +265,55 @@ def build_networkx_graph(g: Graph):
 
     for u, v, edge_label in rdf_diff_list:
         edge_id = str(u)
-        s, p, o = edge_id.split(" ")
-        if "device-on-network" in p or "router-to-network" in p:
-            if s in node_data:
-                node_data[s][edge_label] = str(v)
+        src, pred_name, dst = edge_id.split(" ")
+        if "device-on-network" in pred_name or "router-to-network" in pred_name:
+            if src in node_data:
+                node_data[src][edge_label] = str(v)
             else:
-                node_data[s] = {edge_label: str(v)}
-            if o in node_data:
-                node_data[o][edge_label] = str(v)
+                node_data[src] = {edge_label: str(v)}
+            if dst in node_data:
+                node_data[dst][edge_label] = str(v)
             else:
-                node_data[o] = {edge_label: str(v)}
+                node_data[dst] = {edge_label: str(v)}
         if u in edge_data:
             edge_data[edge_id][edge_label] = str(v)
         else:
             edge_data[edge_id] = {edge_label: str(v)}
 
-        remove_nodes.append(u)
-        remove_nodes.append(v)
+        remove_nodes.add(u)
+        remove_nodes.add(v)
 
-    nx_graph.remove_nodes_from(remove_nodes)
+    # Edges are grouped by source node, in node order (NetworkX adjacency order),
+    # so pyvis keeps the same edge of any reverse pair on undirected networks
+    node_index = {
+        node: i for i, node in enumerate(n for n in nodes if n not in remove_nodes)
+    }
+    graph = NetworkGraph(
+        nodes=list(node_index),
+        edges=sorted(
+            (
+                (u, v, label)
+                for (u, v), label in edges.items()
+                if u in node_index and v in node_index
+            ),
+            key=lambda edge: node_index[edge[0]],
+        ),
+    )
 
-    return nx_graph, node_data, edge_data
+    return graph, node_data, edge_data
 
 
 def pass_networkx_to_pyvis(
-    nx_graph, net: Network, node_data: dict, edge_data: dict
+    graph: NetworkGraph, net: Network, node_data: dict, edge_data: dict
 ) -> None:
-    """Convert networkx graph to pyvis network for visualization.
+    """Convert the network graph to pyvis network for visualization.
 
-    This function takes a NetworkX graph and converts it to a PyVis network object,
-    which can be used for interactive visualization. It adds nodes and edges with
-    their associated metadata.
+    This function takes the graph from build_networkx_graph and converts it to a
+    PyVis network object, which can be used for interactive visualization. It adds
+    nodes and edges with their associated metadata.
 
     Args:
-        nx_graph: The NetworkX graph object
+        graph (NetworkGraph): The network graph from build_networkx_graph
         net (Network): The PyVis network object to populate
         node_data (dict): Dictionary of node attributes
         edge_data (dict): Dictionary of edge attributes
@@ -261,13 +321,104 @@ def pass_networkx_to_pyvis(
     Returns:
         None: The network object is modified in-place
     """
-    for node in nx_graph.nodes:
-        net.add_node(node, data=node_data.get(str(node), {}))
-
-    for u, v, attr in nx_graph.edges(data=True):
-        edge_label = attr.get("triples", [])[0][1] if "triples" in attr else None
+    # Node ids are passed as plain strings: pyvis looks them up with list
+    # membership tests, and str comparisons are far cheaper than URIRef's __eq__
+    for node in graph.nodes:
+        node_id = str(node)
+        net.add_node(node_id, data=node_data.get(node_id, {}))
+
+    # Network.add_edge rescans every edge added so far to drop reverse duplicates
+    # on undirected networks, which is quadratic in the edge count. The same
+    # duplicates are dropped here with a set and the edges appended directly.
+    seen: Set[FrozenSet[str]] = set()
+    for u, v, edge_label in graph.edges:
+        source, dest = str(u), str(v)
+        if not net.directed:
+            pair = frozenset((source, dest))
+            if pair in seen:
+                continue
+            seen.add(pair)
         edge_id = f"{u} {edge_label} {v}"
-        net.add_edge(u, v, label=edge_label, data=edge_data.get(edge_id, {}))
+        edge = Edge(
+            source,
+            dest,
+            net.directed,
+            label=edge_label,
+            data=edge_data.get(edge_id, {}),
+        )
+        net.edges.append(edge.options)
+
+
+def load_canonical_graph(ttl_filepath: str) -> Graph:
+    """Parse and canonicalize a TTL file, reusing the last result if unchanged.
+
+    Canonical labeling is the most expensive part of a comparison, and the compare
+    worker tends to diff the same recent snapshots against each other, so the
+    canonical graph is cached per file and only rebuilt when the file's mtime or
+    size changes. At most CANONICAL_CACHE_SIZE files are kept.
+
+    Args:
+        ttl_filepath (str): Path to the TTL file
+
+    Returns:
+        Graph: The parsed graph with deterministic blank node ids, as produced by
+        rdflib's to_canonical_graph
+    """
+    from rdflib.compare import to_canonical_graph
+
+    st = os.stat(ttl_filepath)
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _canonical_cache.get(ttl_filepath)
+    if cached is not None and cached[0] == version:
+        _canonical_cache.move_to_end(ttl_filepath)
+        return cached[1]
+
+    g = parse_snapshot(Graph(), ttl_filepath)
+    canonical_g = to_canonical_graph(g)
+
+    _canonical_cache[ttl_filepath] = (version, canonical_g)
+    if len(_canonical_cache) > CANONICAL_CACHE_SIZE:
+        _canonical_cache.popitem(last=False)
+    return canonical_g
+
+
+def get_network_json(ttl_filepath: str) -> bytes:
+    """Build the pyvis node/edge JSON for a TTL file, reusing the last result if unchanged.
+
+    Snapshots are rarely rewritten, so the parsed and rendered network is cached
+    per file and only rebuilt when the file's mtime or size changes. At most
+    NETWORK_CACHE_SIZE files are kept. The network is cached as encoded JSON, so
+    repeated requests skip FastAPI's per-request jsonable_encoder pass as well.
+
+    Args:
+        ttl_filepath (str): Path to the TTL file
+
+    Returns:
+        bytes: JSON object with the pyvis "nodes" and "edges" lists
+    """
+    st = os.stat(ttl_filepath)
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _network_cache.get(ttl_filepath)
+    if cached is not None and cached[0] == version:
+        _network_cache.move_to_end(ttl_filepath)
+        return cached[1]
+
+    g = parse_snapshot(Graph(), ttl_filepath)
+    graph, node_data, edge_data = build_networkx_graph(g)
+
+    net = Network()
+    pass_networkx_to_pyvis(graph, net, node_data, edge_data)
+    net_json = json.dumps(
+        {"nodes": net.nodes, "edges": net.edges},
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    _network_cache[ttl_filepath] = (version, net_json)
+    if len(_network_cache) > NETWORK_CACHE_SIZE:
+        _network_cache.popitem(last=False)
+    return net_json
 
 
 def get_file_path(
@@ -311,16 +462,65 @@ def list_files_in_dir(request: Request, folder: str = "ttl") -> List[str]:
         folder (str, optional): The subdirectory to list files from. Defaults to "ttl".
 
     Returns:
-        List[str]: A list of filenames in the specified directory
+        List[str]: A list of filenames in the specified directory, newest first
     """
     agent_data_path = get_agent_data_path(request)
     folder_path = os.path.join(agent_data_path, folder)
-    files = [
-        f
-        for f in os.listdir(folder_path)
-        if os.path.isfile(os.path.join(folder_path, f))
-    ]
-    return files
+    files: List[Tuple[int, str]] = []
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        files.append((entry.stat().st_mtime_ns, entry.name))
+                except FileNotFoundError:
+                    # Deleted while we were listing
+                    continue
+    except FileNotFoundError:
+        return []
+    files.sort(reverse=True)
+    return [name for _, name in files]
+
+
+def list_dir_cached(folder_path: str, suffix: str) -> List[str]:
+    """List filenames ending in suffix, reusing the last listing while the directory is unchanged.
+
+    Adding, removing or renaming an entry updates the directory mtime, so the
+    cached listing is refreshed whenever the contents change. Names are ordered
+    newest first by file mtime, so the latest scans lead the list.
+
+    Args:
+        folder_path (str): The directory to list
+        suffix (str): Only names ending with this suffix are returned
+
+    Returns:
+        List[str]: Matching filenames, or an empty list if the directory doesn't exist
+    """
+    try:
+        mtime = os.stat(folder_path).st_mtime_ns
+    except OSError:
+        return []
+
+    key = (folder_path, suffix)
+    cached = _listdir_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return list(cached[1])
+
+    matches: List[Tuple[int, str]] = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(suffix):
+                continue
+            try:
+                matches.append((entry.stat().st_mtime_ns, entry.name))
+            except FileNotFoundError:
+                # Pruned by the agent while we were listing
+                continue
+    matches.sort(reverse=True)
+    names = [name for _, name in matches]
+    if time.time_ns() - mtime > LISTDIR_RACY_WINDOW_NS:
+        _listdir_cache[key] = (mtime, names)
+    return list(names)
 
 
 @api_router.get("/hello", response_model=MessageResponse)
@@ -332,14 +532,9 @@ async def hello_world():
 @api_router.get("/ttl")
 async def get_ttl_list(request: Request):
     """Gets ttl list"""
-    data = []
     agent_data_path = get_agent_data_path(request)
     graph_ttl_roots = os.path.join(agent_data_path, "ttl/")
-    if os.path.exists(graph_ttl_roots):
-        for filename in os.listdir(graph_ttl_roots):
-            if filename.endswith(".ttl"):
-                data.append(filename)
-    return {"data": data}
+    return {"data": list_dir_cached(graph_ttl_roots, ".ttl")}
 
 
 @api_router.post(
@@ -434,25 +629,24 @@ async def get_ttl_network(ttl_filename: str, request: Request):
             status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
         )
 
-    g = Graph()
-    g.parse(ttl_filepath, format="ttl")
-    nx_graph, node_data, edge_data = build_networkx_graph(g)
-
-    net = Network()
-    pass_networkx_to_pyvis(nx_graph, net, node_data, edge_data)
-    net_data = {"nodes": net.nodes, "edges": net.edges}
-    return net_data
+    return Response(
+        content=get_network_json(ttl_filepath), media_type="application/json"
+    )
 
 
-def get_list_from_queue(queue: Queue) -> List[Dict[str, Any]]:
+def get_list_from_queue(queue: SimpleQueue) -> List[Dict[str, Any]]:
     """Get list of tasks from the queue without removing them.
 
     This function extracts all items from a queue, saves them to a list,
     and then puts them back into the queue, effectively allowing inspection
     of queue contents without consuming them.
 
+    The queues are SimpleQueues, whose put() writes straight to the pipe, so
+    empty() already sees tasks put just before. A Queue hands them to a feeder
+    thread first and could report empty() while they were still in flight.
+
     Args:
-        queue (Queue): The multiprocessing queue to inspect
+        queue (SimpleQueue): The multiprocessing queue to inspect
 
     Returns:
         List[Dict[str, Any]]: A list of all tasks currently in the queue
@@ -483,8 +677,8 @@ async def add_ttl_compare_queue(
     Args:
         compare_files (CompareTTLFiles): Object containing the names of TTL files to compare
         request (Request): The FastAPI request object
-        queue (Queue): The task queue (injected by FastAPI)
-        processing_task (Queue): The processing task queue (injected by FastAPI)
+        queue (SimpleQueue): The task queue (injected by FastAPI)
+        processing_task (SimpleQueue): The processing task queue (injected by FastAPI)
 
     Returns:
         dict: A message confirming the task was accepted and the task details
@@ -613,14 +807,9 @@ async def get_ttl_compare(ttl_filename: str, request: Request):
             status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
         )
 
-    g = Graph()
-    g.parse(ttl_filepath, format="ttl")
-    nx_graph, node_data, edge_data = build_networkx_graph(g)
-
-    net = Network()
-    pass_networkx_to_pyvis(nx_graph, net, node_data, edge_data)
-    net_data = {"nodes": net.nodes, "edges": net.edges}
-    return net_data
+    return Response(
+        content=get_network_json(ttl_filepath), media_type="application/json"
+    )
 
 
 @api_router.delete("/ttl_compare/{ttl_filename}", response_model=MessageResponse)
@@ -644,14 +833,9 @@ async def delete_ttl_compare(ttl_filename: str, request: Request):
 @api_router.get("/network_config")
 async def get_network_config_list(request: Request):
     """Gets network config list"""
-    data = []
     agent_data_path = get_agent_data_path(request)
     network_config_roots = os.path.join(agent_data_path, "network_config")
-    if os.path.exists(network_config_roots):
-        for filename in os.listdir(network_config_roots):
-            if filename.endswith(".json"):
-                data.append(filename)
-    return {"data": data}
+    return {"data": list_dir_cached(network_config_roots, ".json")}
 
 
 @api_router.post(
@@ -752,12 +936,10 @@ async def export_csv(ttl_filename: str, request: Request):
             status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
         )
 
-    g = Graph()
-    g.parse(ttl_filepath, format="ttl")
-    nx_graph, node_data, edge_data = build_networkx_graph(g)
+    g = parse_snapshot(Graph(), ttl_filepath)
+    graph, node_data, edge_data = build_networkx_graph(g)
 
-    for u, v, attr in nx_graph.edges(data=True):
-        edge_label = attr.get("triples", [])[0][1] if "triples" in attr else None
+    for u, v, edge_label in graph.edges:
         if edge_label:
             if "device-on-network" in edge_label:
                 if "router" in str(u):
@@ -779,7 +961,7 @@ async def export_csv(ttl_filename: str, request: Request):
     )
 
     # Write Rows
-    for node in nx_graph.nodes:
+    for node in graph.nodes:
         device_type = node_data.get(str(node), {}).get("type", "")
         if device_type in ["Device", "Router"]:
             device_id = str(node).split("/")[-1]
@@ -845,7 +1027,6 @@ def device_config_write_key(agent_data_path: str, key: str, value: Any) -> bool:
         bool: True on success, False on any error
     """
     config_path = os.path.join(agent_data_path, DEVICE_STATE_CONFIG)
-    os.makedirs(os.path.dirname(config_path), exist_ok=True)
 
     try:
         if os.path.exists(config_path):
@@ -6,9 +6,9 @@ import argparse
 import asyncio
 import ipaddress
 import logging
-from typing import Any, List, Set, Union
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
-import gevent
 import rdflib
 from bacpypes3.app import Application
 from bacpypes3.comm import ApplicationServiceElement, bind
@@ -23,16 +23,13 @@ from bacpypes3.ipv4.service import BVLLServiceAccessPoint
 from bacpypes3.pdu import Address, IPv4Address, IPv6Address
 from bacpypes3.primitivedata import ObjectIdentifier
 from bacpypes3.rdf.core import BACnetGraph, BACnetNS, BACnetURI
-from rdflib import RDF, Graph, Literal, Namespace  # type: ignore
-from rdflib.compare import graph_diff, to_isomorphic
-from rdflib.extras.external_graph_libs import (
-    rdflib_to_networkx_digraph,
-    rdflib_to_networkx_graph,
-)
+from rdflib import RDF, Graph, Literal, Namespace, URIRef  # type: ignore
 from rdflib.namespace import RDFS
 from volttron.platform.agent import utils
 
 from .rdf_components import (
+    NETWORK_PREFIX,
+    SUBNET_PREFIX,
     AttachDeviceComponent,
     BACnetNode,
     BBMDNode,
@@ -52,6 +49,13 @@ from .rdf_components import (
 _log = logging.getLogger(__name__)
 utils.setup_logging()
 
+# Upper bound on Who-Is requests in flight at once during a device sweep
+MAX_CONCURRENT_WHO_IS: int = 32
+
+# Upper bound on BVLL table reads in flight at once, when probing devices for BBMDs
+# and when reading the configured BBMDs' foreign device tables
+MAX_CONCURRENT_BDT_READS: int = 32
+
 
 class BVLLServiceElement(ApplicationServiceElement):
     """
@@ -138,11 +142,13 @@ class BVLLServiceElement(ApplicationServiceElement):
             return result
         except asyncio.TimeoutError:
             _log.error(
-                f"Timeout while waiting for {request_class.__name__} response from {destination}"
+                "Timeout while waiting for %s response from %s",
+                request_class.__name__,
+                destination,
             )
             return None
         except Exception as e:
-            _log.error(f"Error in {request_class.__name__} request: {e}")
+            _log.error("Error in %s request: %s", request_class.__name__, e)
             return None
         finally:
             if not task.done():
@@ -151,7 +157,7 @@ class BVLLServiceElement(ApplicationServiceElement):
                 try:
                     task.exception()
                 except (asyncio.CancelledError, asyncio.InvalidStateError) as e:
-                    _log.error(f"Task was cancelled or invalid state: {task}: {e}")
+                    _log.error("Task was cancelled or invalid state: %s: %s", task, e)
 
             if destination in request_registry:
                 del request_registry[destination]
@@ -193,6 +199,74 @@ class BVLLServiceElement(ApplicationServiceElement):
         )
 
 
+class BACnetApplicationCache:
+    """
+    A BACnet application and its BVLL service element, kept between scans.
+
+    Building the application binds its sockets, so whoever owns the event loop
+    the scans run on keeps one of these and passes it to each scanner it creates.
+    It must only be used from that loop's thread.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty cache.
+        """
+        self.app: Optional[Application] = None
+        self.ase: Optional[BVLLServiceElement] = None
+        # id() of the loop the application was built on, kept rather than the
+        # loop itself so a closed loop isn't held on to
+        self.loop_id: Optional[int] = None
+
+    def get(self, bacpypes_settings: Dict[str, Any]) -> Application:
+        """
+        Return the cached application, building it first if needed.
+
+        Must be called from a coroutine on the loop the application is used on.
+        Settings changes are not detected here; the owner closes the cache when
+        it applies new settings.
+
+        Args:
+            bacpypes_settings (Dict[str, Any]): BACpypes application configuration settings
+
+        Returns:
+            Application: The BACnet application, with `ase` bound to its BVLL layer
+        """
+        loop_id = id(asyncio.get_running_loop())
+        if self.app is not None and self.loop_id == loop_id:
+            return self.app
+
+        self.close()
+        app_settings = argparse.Namespace(**bacpypes_settings)
+        _log.debug("Application config: %s", app_settings)
+        app = Application.from_args(app_settings)
+
+        sap = app.nsap.local_adapter.clientPeer
+        assert isinstance(sap, BVLLServiceAccessPoint)
+        ase = BVLLServiceElement()
+        bind(ase, sap)
+
+        self.app = app
+        self.ase = ase
+        self.loop_id = loop_id
+        return app
+
+    def close(self) -> None:
+        """
+        Close the cached application, if one has been built.
+        """
+        if self.app is None:
+            return
+        _log.debug("BACnetApplicationCache: close")
+        try:
+            self.app.close()
+        except Exception as e:
+            _log.error("Error closing BACnet application: %s", e)
+        self.app = None
+        self.ase = None
+        self.loop_id = None
+
+
 class bacpypes3_scanner:
     """
     Scanner for discovering and mapping BACnet networks and devices.
@@ -212,6 +286,7 @@ class bacpypes3_scanner:
         device_broadcast_full_step_size: int = 100,
         scan_low_limit: int = 0,
         scan_high_limit: int = 4194303,
+        app_cache: Optional[BACnetApplicationCache] = None,
     ) -> None:
         """
         Initialize the BACpypes3 scanner with the given settings.
@@ -229,6 +304,8 @@ class bacpypes3_scanner:
                 Defaults to 0.
             scan_high_limit (int, optional): Upper limit of device instance numbers to scan.
                 Defaults to 4194303.
+            app_cache (BACnetApplicationCache, optional): Cache holding the BACnet
+                application between scans. Defaults to a new, empty cache.
         """
         _log.debug("bacpypes3_scanner: init")
         self.bacpypes_settings = bacpypes_settings
@@ -253,18 +330,20 @@ class bacpypes3_scanner:
             ipaddress.IPv4Address, list[ipaddress.IPv4Address]
         ] = {}
         self.scanned_bbmds_fdt: dict[Address, Any] = {}
+        self.app_cache = (
+            app_cache if app_cache is not None else BACnetApplicationCache()
+        )
 
     async def set_application(self, graph: Graph) -> Application:
         """
         Set the application address for the BACnet analysis
+
+        The application comes from the scanner's application cache, so it is only
+        built when the cache is empty or the scan runs on a different event loop
+        than the cached application.
         """
         _log.debug("bacpypes3_scanner: set_application")
-        settings = self.bacpypes_settings.copy()
-        bbmd_ips = self.get_bbmd_ips(graph)
-        settings["bbmd"] = self.bacpypes_settings.get("bbmd", None)
-        app_settings = argparse.Namespace(**self.bacpypes_settings)
-        _log.debug(f"Application config: {app_settings}")
-        return Application.from_args(app_settings)
+        return self.app_cache.get(self.bacpypes_settings)
 
     def get_networks_from_graph(self, g: rdflib.Graph) -> Set[int]:
         """Return a set of network numbers from the graph"""
@@ -327,7 +406,7 @@ class bacpypes3_scanner:
         Main scanning method that discovers devices and routers on the BACnet network.
 
         This method performs the complete scanning process:
-        1. Sets up the BACnet application
+        1. Sets up (or reuses) the BACnet application
         2. Creates the scanner node in the graph
         3. Discovers devices on the network
         4. Discovers routers and their networks
@@ -342,18 +421,13 @@ class bacpypes3_scanner:
         """
         _log.debug("Running Async for Who Is and Router to network")
         app = await self.set_application(graph)
-        local_adapter = app.nsap.local_adapter
-        sap = local_adapter.clientPeer
-        assert isinstance(sap, BVLLServiceAccessPoint)
-        ase = BVLLServiceElement()
-        bind(ase, sap)
+        ase = self.app_cache.ase
+        assert ase is not None
         await self.set_scanner_node(graph)
         await self.get_device_objects(app, ase, graph)
         await self.get_router_networks(app, graph)
-        for bbmd in self.bbmds:
-            await self.read_bbmd_fdt(ase, bbmd)
+        await self.read_bbmd_fdts(ase)
         await self.set_subnet_network(graph)
-        app.close()
 
     async def get_router_networks(self, app: Application, graph: Graph) -> None:
         """
@@ -375,15 +449,18 @@ class bacpypes3_scanner:
             None
         """
         _log.debug("bacpypes3_scanner: get_router_networks")
+        router_prefix = str(BACnetURI["//router/"])
         for network_id in self.scanned_networks:
-            _log.debug(f"Currently Processing network {network_id}")
+            _log.debug("Currently Processing network %s", network_id)
             routers = await app.nse.who_is_router_to_network(network=network_id)
             for adapter, i_am_router_to_network in routers:
                 _log.debug(
-                    f"adapter: {adapter} i_am_router_to_network: {i_am_router_to_network}"
+                    "adapter: %s i_am_router_to_network: %s",
+                    adapter,
+                    i_am_router_to_network,
                 )
                 router_pdu_source = i_am_router_to_network.pduSource
-                router_iri = BACnetURI["//router/" + str(router_pdu_source)]
+                router_iri = URIRef(router_prefix + str(router_pdu_source))
                 router_node = RouterNode(graph, router_iri)
                 for net in i_am_router_to_network.iartnNetworkList:
                     router_node.add_properties(network_id=net)
@@ -457,6 +534,28 @@ class bacpypes3_scanner:
         except Exception as e:
             pass
 
+    async def read_bbmd_fdts(self, ase: BVLLServiceElement) -> None:
+        """
+        Read the Foreign Device Tables of all configured BBMDs.
+
+        A BBMD that doesn't answer makes its read wait out the timeout, so the reads
+        overlap, at most MAX_CONCURRENT_BDT_READS at a time.
+
+        Args:
+            ase (BVLLServiceElement): The BVLL service element for sending the requests
+
+        Returns:
+            None
+        """
+        fdt_read_limit = asyncio.Semaphore(MAX_CONCURRENT_BDT_READS)
+
+        async def read_fdt(device_address: Address) -> None:
+            """Read a single BBMD's FDT, bounded by the semaphore."""
+            async with fdt_read_limit:
+                await self.read_bbmd_fdt(ase, device_address)
+
+        await asyncio.gather(*(read_fdt(bbmd) for bbmd in self.bbmds))
+
     async def add_subnet_to_device(
         self, device: BACnetNode, ip: Address
     ) -> Union[ipaddress.IPv4Network, ipaddress.IPv6Network]:
@@ -489,6 +588,51 @@ class bacpypes3_scanner:
 
         return device_subnet
 
+    def get_who_is_ranges(self) -> List[Tuple[int, int]]:
+        """
+        Split the configured instance range into inclusive Who-Is ranges.
+
+        Each range spans device_broadcast_empty_step_size instances, but is cut short
+        as soon as it covers device_broadcast_full_step_size devices known from the
+        previous graph. This keeps requests small in device-dense areas and large in
+        sparse areas.
+
+        The known device instances are collected from the previous graph once and
+        searched with bisect, rather than probing the graph for every instance.
+
+        Returns:
+            List[Tuple[int, int]]: Inclusive (low, high) instance ranges
+        """
+        device_prefix = str(BACnetURI["//"])
+        known_set: Set[int] = set()
+        for subject in self.prev_graph.subjects(unique=True):
+            subject_str = str(subject)
+            if not subject_str.startswith(device_prefix):
+                continue
+            instance = subject_str[len(device_prefix) :]
+            if instance.isdigit() and str(int(instance)) == instance:
+                known_set.add(int(instance))
+        known_instances = sorted(known_set)
+
+        def get_known_device_end_range(start_pos: int) -> int:
+            """Return the upper bound of the range starting at start_pos."""
+            full_step = self.device_broadcast_full_step_size
+            if full_step <= 0:
+                return start_pos
+            end_pos = start_pos + self.device_broadcast_empty_step_size
+            first = bisect_left(known_instances, start_pos)
+            if bisect_left(known_instances, end_pos) - first >= full_step:
+                return known_instances[first + full_step - 1]
+            return end_pos
+
+        ranges: List[Tuple[int, int]] = []
+        track_lower = self.low_limit
+        while track_lower <= self.high_limit:
+            track_upper = min(get_known_device_end_range(track_lower), self.high_limit)
+            ranges.append((track_lower, track_upper))
+            track_lower = track_upper + 1
+        return ranges
+
     async def get_device_objects(
         self, app: Application, ase: BVLLServiceElement, graph: Graph
     ) -> None:
@@ -503,7 +647,10 @@ class bacpypes3_scanner:
         4. Checks if the device is a BBMD by attempting to read its BDT
 
         The method uses an adaptive scanning approach, adjusting the scan range based on
-        the density of devices in previous scans to optimize network traffic.
+        the density of devices in previous scans to optimize network traffic. The
+        resulting ranges are broadcast concurrently, at most MAX_CONCURRENT_WHO_IS
+        at a time, and the BBMD probes likewise at most MAX_CONCURRENT_BDT_READS at a
+        time.
 
         Args:
             app (Application): The BACnet application object
@@ -515,92 +662,102 @@ class bacpypes3_scanner:
         """
         _log.debug("bacpypes3_scanner: get_device_objects")
 
-        def get_known_device_end_range(graph: Graph, start_pos: int) -> int:
-            """
-            Determine the optimal upper bound for the next Who-Is request.
-
-            This helper function analyzes the existing graph to find an appropriate
-            upper bound for the next device scan range. It helps optimize scanning
-            by using smaller steps in device-dense areas and larger steps in sparse areas.
-
-            Args:
-                graph (Graph): The RDF graph containing previously discovered devices
-                start_pos (int): The starting device instance ID for this range
-
-            Returns:
-                int: The ending device instance ID for this range
-            """
-            current_pos = start_pos
-            end_pos = current_pos + self.device_broadcast_empty_step_size
-            track_routers = 0
-            while current_pos < end_pos:
-                if any(graph.triples((BACnetURI["//" + str(current_pos)], None, None))):
-                    track_routers += 1
-                if track_routers >= self.device_broadcast_full_step_size:
-                    return current_pos
-                current_pos += 1
-            return end_pos
+        ranges = self.get_who_is_ranges()
 
-        track_lower = self.low_limit
-        while track_lower <= self.high_limit:
-            _log.debug(f"Currently Processing devices at {track_lower}")
-            track_upper = get_known_device_end_range(self.prev_graph, track_lower)
-            if track_upper > self.high_limit:
-                track_upper = self.high_limit
+        who_is_limit = asyncio.Semaphore(MAX_CONCURRENT_WHO_IS)
+
+        async def who_is_range(low: int, high: int) -> List[Any]:
+            """Send a single Who-Is for the range, bounded by the semaphore."""
+            async with who_is_limit:
+                _log.debug("Currently Processing devices at %s", low)
+                i_ams: List[Any] = await app.who_is(low, high)
+                _log.debug("Finished Scanning for devices at %s", low)
+                return i_ams
+
+        # The ranges only depend on the previous graph, so the Who-Is requests can
+        # overlap instead of waiting out each broadcast timeout in turn.
+        results = await asyncio.gather(
+            *(who_is_range(low, high) for low, high in ranges),
+            return_exceptions=True,
+        )
 
+        # A device can answer more than one Who-Is, so only build it into the graph
+        # (and probe its BDT) once per address
+        seen: Set[Tuple[str, int]] = set()
+        i_am_responses: List[Any] = []
+        for i_ams in results:
+            if isinstance(i_ams, BaseException):
+                _log.error("Error in Who Is: %s", i_ams)
+                continue
+
+            for i_am in i_ams:
+                device_key = (str(i_am.pduSource), i_am.iAmDeviceIdentifier[1])
+                if device_key in seen:
+                    continue
+                seen.add(device_key)
+                i_am_responses.append(i_am)
+
+        # Every device that isn't a BBMD makes its BDT read wait out the timeout, so
+        # the reads overlap too, once per IP address
+        ip_devices: Dict[str, Address] = {}
+        for i_am in i_am_responses:
             try:
-                i_ams = await app.who_is(track_lower, track_upper)
-            except Exception as e:
-                _log.error(f"Error in Who Is: {e}")
-                track_lower = track_upper + 1
+                ipaddress.ip_address(i_am.pduSource)
+            except ValueError:
                 continue
+            ip_devices.setdefault(str(i_am.pduSource), i_am.pduSource)
 
-            _log.debug(f"Finished Scanning for devices at {track_lower}")
+        bdt_read_limit = asyncio.Semaphore(MAX_CONCURRENT_BDT_READS)
 
-            for i_am in i_ams:
-                device_address: Address = i_am.pduSource
-                device_identifier: ObjectIdentifier = i_am.iAmDeviceIdentifier
-                device_iri = BACnetURI["//" + str(device_identifier[1])]
-                try:
-                    ip: Union[IPv4Address, IPv6Address] = ipaddress.ip_address(
-                        device_address
-                    )
-                    device: Union[BBMDNode, DeviceNode]
-                    if (
-                        await self.check_if_device_is_bbmd(ase, device_address)
-                        or ip in self.bbmds
-                    ):
-                        device = BBMDNode(graph, device_iri)
-                    else:
-                        device = DeviceNode(graph, device_iri)
-
-                    device.add_properties(
-                        label=device_iri,
-                        device_identifier=device_identifier[1],
-                        device_address=device_address,
-                        vendor_id=i_am.vendorID,
-                    )
-
-                    device_subnet = await self.add_subnet_to_device(
-                        device, device_address
-                    )
-
-                    if isinstance(device, BBMDNode):
-                        self.bbmd_in_subnet[device_subnet] = device_iri
-                        self.scanned_bbmds.append(device)
-                        self.scanned_ipaddress_bbmd[ip] = device
-                except ValueError:
+        async def probe_bbmd(device_address: Address) -> bool:
+            """Check a single device for a BDT, bounded by the semaphore."""
+            async with bdt_read_limit:
+                return await self.check_if_device_is_bbmd(ase, device_address)
+
+        bbmd_probes = await asyncio.gather(
+            *(probe_bbmd(device_address) for device_address in ip_devices.values())
+        )
+        is_bbmd: Dict[str, bool] = dict(zip(ip_devices, bbmd_probes))
+
+        device_prefix = str(BACnetURI["//"])
+        for i_am in i_am_responses:
+            device_address: Address = i_am.pduSource
+            device_identifier: ObjectIdentifier = i_am.iAmDeviceIdentifier
+            device_iri = URIRef(device_prefix + str(device_identifier[1]))
+            try:
+                ip: Union[IPv4Address, IPv6Address] = ipaddress.ip_address(
+                    device_address
+                )
+                device: Union[BBMDNode, DeviceNode]
+                if is_bbmd[str(device_address)] or ip in self.bbmds:
+                    device = BBMDNode(graph, device_iri)
+                else:
                     device = DeviceNode(graph, device_iri)
-                    device.add_properties(
-                        label=device_iri,
-                        device_identifier=device_identifier[1],
-                        device_address=device_address,
-                        vendor_id=i_am.vendorID,
-                        network_id=device_address.addrNet,
-                    )
-                    self.scanned_networks.add(device_address.addrNet)
 
-            track_lower = track_upper + 1
+                device.add_properties(
+                    label=device_iri,
+                    device_identifier=device_identifier[1],
+                    device_address=device_address,
+                    vendor_id=i_am.vendorID,
+                )
+
+                device_subnet = await self.add_subnet_to_device(device, device_address)
+
+                if isinstance(device, BBMDNode):
+                    self.bbmd_in_subnet[device_subnet] = device_iri
+                    self.scanned_bbmds.append(device)
+                    self.scanned_ipaddress_bbmd[ip] = device
+            except ValueError:
+                device = DeviceNode(graph, device_iri)
+                device.add_properties(
+                    label=device_iri,
+                    device_identifier=device_identifier[1],
+                    device_address=device_address,
+                    vendor_id=i_am.vendorID,
+                    network_id=device_address.addrNet,
+                )
+                self.scanned_networks.add(device_address.addrNet)
+
         _log.debug("get_device_objects Completed")
 
     async def set_subnet_network(self, graph: Graph) -> None:
@@ -618,10 +775,10 @@ class bacpypes3_scanner:
         """
         _log.debug("bacpypes3_scanner: set_subnet_network")
         for subnet in self.subnets:
-            SubnetNode(graph, BACnetURI["//subnet/" + str(subnet)])
+            SubnetNode(graph, URIRef(SUBNET_PREFIX + str(subnet)))
 
         for net in self.scanned_networks:
-            NetworkNode(graph, BACnetURI["//network/" + str(net)])
+            NetworkNode(graph, URIRef(NETWORK_PREFIX + str(net)))
 
         try:
             for bbmd_ipaddress, bdt in self.scanned_bbmds_bdt.items():
@@ -633,9 +790,9 @@ class bacpypes3_scanner:
                         ]
                         bbmd.add_properties(device_iri=bdt_entry_bbmd.node_iri)
         except Exception as e:
-            _log.debug(f"scanned_bbmds_fdt: {self.scanned_bbmds_fdt}")
-            _log.error(f"Error in setting BDT: {e}")
+            _log.debug("scanned_bbmds_fdt: %s", self.scanned_bbmds_fdt)
+            _log.error("Error in setting BDT: %s", e)
 
-        _log.debug(f"scanned_bbmds_bdt: {self.scanned_bbmds_bdt}")
-        _log.debug(f"scanned_bbmds_fdt: {self.scanned_bbmds_fdt}")
+        _log.debug("scanned_bbmds_bdt: %s", self.scanned_bbmds_bdt)
+        _log.debug("scanned_bbmds_fdt: %s", self.scanned_bbmds_fdt)
         _log.debug("set_subnet_network Completed")
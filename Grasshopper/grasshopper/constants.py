@@ -0,0 +1,8 @@
+"""
+Constants shared between the agent and the web API.
+
+Kept free of third-party imports so the agent can use them without loading
+the web stack.
+"""
+
+DEVICE_STATE_CONFIG: str = "device_config.json"
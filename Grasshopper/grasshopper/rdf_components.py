@@ -5,12 +5,20 @@ Uses composition for building devices
 
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Iterable, List, Optional, Tuple, Union
 
 from bacpypes3.rdf.core import BACnetNS, BACnetURI
 from rdflib import RDF, Graph, Literal, Namespace, URIRef  # type: ignore
 from rdflib.namespace import RDFS
 
+# IRI prefixes and predicates shared by every node, resolved once at import
+SUBNET_PREFIX: str = str(BACnetURI["//subnet/"])
+NETWORK_PREFIX: str = str(BACnetURI["//network/"])
+VENDOR_PREFIX: str = str(BACnetURI["//vendor/"])
+DEVICE_INSTANCE: URIRef = BACnetNS["device-instance"]
+ADDRESS: URIRef = BACnetNS["address"]
+VENDOR_ID: URIRef = BACnetNS["vendor-id"]
+
 
 class BACnetEdgeType(Enum):
     """
@@ -139,6 +147,9 @@ class BaseNode:
     of the node.
     """
 
+    # Nodes are created for every device in every scan, so skip the per-instance dict
+    __slots__ = ("graph", "node_iri", "type_handler")
+
     def __init__(
         self, graph: Graph, node_iri: URIRef, type_handler: BaseTypeHandler
     ) -> None:
@@ -173,6 +184,24 @@ class BaseNode:
         """
         self.graph.add((self.node_iri, predicate, new_object))  # type: ignore
 
+    def add_connections(
+        self, connections: Iterable[Tuple[URIRef, Union[URIRef, Literal]]]
+    ) -> None:
+        """
+        Adds several triples in one call.
+
+        Equivalent to calling add_connection for each (predicate, object) pair, but
+        hands the triples to the graph in a single addN call.
+
+        Args:
+            connections (Iterable[Tuple[URIRef, Union[URIRef, Literal]]]): The
+                (predicate, object) pairs to add for this node
+        """
+        self.graph.addN(
+            (self.node_iri, predicate, new_object, self.graph)  # type: ignore
+            for predicate, new_object in connections
+        )
+
     def set_type(self):
         """
         Delegate type setting to the assigned handler.
@@ -201,6 +230,8 @@ class BaseNode:
 class SubnetNode(BaseNode):
     """A BACnet subnet node that can include network, or additional behavior via composition."""
 
+    __slots__ = ()
+
     def __init__(self, graph, node_iri):
         super().__init__(graph, node_iri, SubnetTypeHandler())
 
@@ -208,6 +239,8 @@ class SubnetNode(BaseNode):
 class NetworkNode(BaseNode):
     """A BACnet network node that can include subnet, or additional behavior via composition."""
 
+    __slots__ = ()
+
     def __init__(self, graph, node_iri):
         super().__init__(graph, node_iri, NetworkTypeHandler())
 
@@ -217,6 +250,7 @@ class BaseBACnetComponent(ABC):
 
     def __init__(self, edge_type: BACnetEdgeType):
         self.edge_type = edge_type
+        self.predicate = BACnetNS[edge_type.value]
 
     @abstractmethod
     def add_properties(self, device: BaseNode, **kwargs):
@@ -230,9 +264,7 @@ class SubnetComponent(BaseBACnetComponent):
     def add_properties(self, device: BaseNode, **kwargs):
         subnet = kwargs.get("subnet")
         if subnet:
-            device.add_connection(
-                BACnetNS[self.edge_type.value], BACnetURI["//subnet/" + str(subnet)]
-            )
+            device.add_connection(self.predicate, URIRef(SUBNET_PREFIX + str(subnet)))
 
 
 class NetworkComponent(BaseBACnetComponent):
@@ -242,8 +274,7 @@ class NetworkComponent(BaseBACnetComponent):
         network_id = kwargs.get("network_id")
         if network_id:
             device.add_connection(
-                BACnetNS[self.edge_type.value],
-                BACnetURI["//network/" + str(network_id)],
+                self.predicate, URIRef(NETWORK_PREFIX + str(network_id))
             )
 
 
@@ -253,12 +284,14 @@ class AttachDeviceComponent(BaseBACnetComponent):
     def add_properties(self, device: BaseNode, **kwargs):
         device_iri = kwargs.get("device_iri")
         if device_iri:
-            device.add_connection(BACnetNS[self.edge_type.value], device_iri)
+            device.add_connection(self.predicate, device_iri)
 
 
 class BACnetNode(BaseNode):
     """A BACnet node that can include subnet, network, or additional behavior via composition."""
 
+    __slots__ = ("components",)
+
     def __init__(
         self,
         graph,
@@ -267,7 +300,6 @@ class BACnetNode(BaseNode):
         components: Optional[List[BaseBACnetComponent]] = None,
     ):
         super().__init__(graph, device_iri, type_handler)
-        self.device = BaseNode(graph, device_iri, type_handler)
         self.components = components or []
 
     def add_properties(
@@ -279,23 +311,27 @@ class BACnetNode(BaseNode):
         **kwargs,
     ) -> None:
         """Add properties common to all devices."""
-        super().add_properties(label=label, **kwargs)
+        connections: List[Tuple[URIRef, Union[URIRef, Literal]]] = []
+        if label:
+            connections.append((RDFS.label, Literal(label)))
         if device_identifier:
-            self.add_connection(BACnetNS["device-instance"], Literal(device_identifier))
+            connections.append((DEVICE_INSTANCE, Literal(device_identifier)))
         if device_address:
-            self.add_connection(BACnetNS["address"], Literal(str(device_address)))
+            connections.append((ADDRESS, Literal(str(device_address))))
         if vendor_id:
-            self.add_connection(
-                BACnetNS["vendor-id"], BACnetURI["//vendor/" + str(vendor_id)]
-            )
+            connections.append((VENDOR_ID, URIRef(VENDOR_PREFIX + str(vendor_id))))
+        if connections:
+            self.add_connections(connections)
 
         for component in self.components:
-            component.add_properties(self.device, **kwargs)
+            component.add_properties(self, **kwargs)
 
 
 class BBMDNode(BACnetNode):
     """A BBMD node that can include subnet, network, or additional behavior via composition."""
 
+    __slots__ = ()
+
     def __init__(self, graph, device_iri):
         components = [
             AttachDeviceComponent(BACnetEdgeType.BDT_ENTRY),
@@ -309,6 +345,8 @@ class BBMDNode(BACnetNode):
 class DeviceNode(BACnetNode):
     """A standard BACnet device node that can include subnet, network, or additional behavior via composition."""
 
+    __slots__ = ()
+
     def __init__(self, graph, device_iri):
         components = [
             NetworkComponent(BACnetEdgeType.DEVICE_ON_NETWORK),
@@ -320,6 +358,8 @@ class DeviceNode(BACnetNode):
 class RouterNode(BACnetNode):
     """A BACnet router node that can include subnet, network, or additional behavior via composition."""
 
+    __slots__ = ()
+
     def __init__(self, graph, device_iri):
         components = [
             NetworkComponent(BACnetEdgeType.DEVICE_ON_NETWORK),
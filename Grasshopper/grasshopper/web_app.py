@@ -1,5 +1,6 @@
 """FastAPI application for Grasshopper"""
 
+import logging
 import os
 
 from fastapi import FastAPI, HTTPException, Request
@@ -9,6 +10,8 @@ from fastapi.staticfiles import StaticFiles
 
 from .api import api_router
 
+_log = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DIST_DIR = os.path.join(BASE_DIR, "dist")
 ASSETS_DIR = os.path.join(DIST_DIR, "assets")
@@ -72,7 +75,7 @@ def create_app(config_class=None):
     config_class_obj = globals().get(config_class)
     if not config_class_obj:
         app.extra["config"] = DevelopmentConfig()
-        print(f"Config class '{config_class}' not found.")
+        _log.warning("Config class '%s' not found.", config_class)
     else:
         app.extra["config"] = config_class_obj()
 
@@ -23,77 +23,118 @@ smooth: Defines whether and how the edge is drawn smoothly. Possible values incl
 hidden: Whether the edge is hidden (i.e., not displayed).
 """
 
+import logging
+from typing import List, NamedTuple, Tuple
+
 from rdflib import Graph
-from rdflib.extras.external_graph_libs import rdflib_to_networkx_digraph
-import networkx as nx
 from pyvis.network import Network
 from bacpypes3.rdf.core import BACnetNS
 from rdflib.namespace import RDFS
 
+_log = logging.getLogger(__name__)
+
+# Edge labels kept in the graph; other non-RDFS edges point at property values
+NETWORK_EDGE_LABELS = frozenset(("device-on-network", "router-to-network"))
+
+# Node kinds, assigned once per node while the graph is built
+ROUTER_NODE, NETWORK_NODE, OTHER_NODE = range(3)
+
+# (color, size, title) per node kind; other nodes are titled with their data
+NODE_STYLES = {
+    ROUTER_NODE: ("cyan", 30, "Router Node"),
+    NETWORK_NODE: ("green", 20, "Network Node"),
+    OTHER_NODE: ("red", 10, None),
+}
+
+
+class NetworkGraph(NamedTuple):
+    """Nodes and labelled (u, v, label) edges kept for display"""
+
+    nodes: List[str]
+    edges: List[Tuple[str, str, str]]
+
 
 def build_networkx_graph(g):
     """
-    Build a networkx graph from the BACnet graph
-    """
+    Build the displayed graph from the BACnet graph
 
-    def custom_edge_attrs(s, p, o):
-        if RDFS._NS in p:
-            label = p
-        else:
-            label = f"{str(p).split('#')[-1]}"
-        return {
-            "label": label,
-            "color": "red",
-        }
-
-    def custom_transform_node_str(s):
-        if RDFS._NS in s:
-            return s
-        elif BACnetNS in s:
-            return f"{str(s).split('#')[-1]}"
-        else:
-            return s
+    The triples are walked once into node and edge lists instead of a NetworkX
+    graph that is mostly deleted again. Each (subject, object) pair keeps the
+    label of its first triple, and edges are walked grouped by source node in
+    node order, as rdflib_to_networkx_digraph would leave them.
+    """
 
-    nx_graph = rdflib_to_networkx_digraph(
-        g,
-        edge_attrs=custom_edge_attrs,
-        transform_s=custom_transform_node_str,
-        transform_o=custom_transform_node_str,
+    rdfs_ns = str(RDFS._NS)
+    bacnet_ns = str(BACnetNS)
+    node_str_cache = {}
+    node_kind = {}
+
+    def edge_label(p):
+        if p.startswith(rdfs_ns):
+            return p
+        return p.rpartition("#")[2]
+
+    def transform_node_str(s):
+        # Subjects and objects repeat across many triples, transform each once
+        node_str = node_str_cache.get(s)
+        if node_str is None:
+            if not s.startswith(rdfs_ns) and s.startswith(bacnet_ns):
+                node_str = s.rpartition("#")[2]
+            else:
+                node_str = s
+            node_str_cache[s] = node_str
+            if "router/" in node_str:
+                node_kind[node_str] = ROUTER_NODE
+            elif "network/" in node_str:
+                node_kind[node_str] = NETWORK_NODE
+            else:
+                node_kind[node_str] = OTHER_NODE
+        return node_str
+
+    node_index = {}
+    edges = {}
+    for s, p, o in g:
+        u, v = transform_node_str(s), transform_node_str(o)
+        node_index.setdefault(u, len(node_index))
+        node_index.setdefault(v, len(node_index))
+        if (u, v) not in edges:
+            edges[(u, v)] = edge_label(p)
+
+    # Group edges by source node, in node order
+    ordered_edges = sorted(
+        ((u, v, label) for (u, v), label in edges.items()),
+        key=lambda edge: node_index[edge[0]],
     )
 
-    is_directed = nx_graph.is_directed()
-    print(f"Is the graph directed? {is_directed}")
-
-    remove_nodes = []
+    remove_nodes = set()
     rdf_edges = {}
     device_address_edges = []
     data = {}
-    for u, v, attr in nx_graph.edges(data=True):
-        label = attr.get("label", "")
-        if RDFS._NS in label:
-            print("rdfs: ", u, v)
+    for u, v, label in ordered_edges:
+        if label.startswith(rdfs_ns):
+            _log.debug("rdfs: %s %s", u, v)
             rdf_edges[u] = v
-            remove_nodes.append(u)
-            remove_nodes.append(v)
-        elif "device-address" in label:
+            remove_nodes.add(u)
+            remove_nodes.add(v)
+        elif label == "device-address":
             device_address_edges.append((u, v))
-        elif "device-instance" in label:
+        elif label == "device-instance":
             if u in data:
                 data[u]["device instance"] = str(v)
             else:
                 data[u] = {"device instance": str(v)}
-            remove_nodes.append(v)
-        elif str(label) == "a":
+            remove_nodes.add(v)
+        elif label == "a":
             if u in data:
                 data[u]["bacnet type"] = str(v)
             else:
                 data[u] = {"bacnet type": str(v)}
-            remove_nodes.append(v)
-        elif label not in ["device-on-network", "router-to-network"]:
-            remove_nodes.append(v)
+            remove_nodes.add(v)
+        elif label not in NETWORK_EDGE_LABELS:
+            remove_nodes.add(v)
         elif label == "device-on-network" and "network/None" in v:
-            remove_nodes.append(v)
-            remove_nodes.append(u)
+            remove_nodes.add(v)
+            remove_nodes.add(u)
 
     for u, v in device_address_edges:
         if u in data:
@@ -101,43 +142,60 @@ def build_networkx_graph(g):
         else:
             data[u] = {"device address": str(rdf_edges[v])}
 
-    nx_graph.remove_nodes_from(remove_nodes)
-
-    return nx_graph, data
-
-
-def pass_networkx_to_pyvis(nx_graph, net: Network, data):
-    for node in nx_graph.nodes:
-        if "router/" in node:
-            color = "cyan"
-            size = 30
-            title = "Router Node"
-        elif "network/" in node:
-            color = "green"
-            size = 20
-            title = "Network Node"
-        else:
-            color = "red"
-            size = 10
-            title = str(data.get(node, {}))
+    graph = NetworkGraph(
+        nodes=[node for node in node_index if node not in remove_nodes],
+        edges=[
+            edge
+            for edge in ordered_edges
+            if edge[0] not in remove_nodes and edge[1] not in remove_nodes
+        ],
+    )
 
-        net.add_node(node, size=size, title=title, data=data.get(node, {}), color=color)
+    return graph, data, node_kind
 
-    print("edges: ", len(nx_graph.edges))
-    for edge in nx_graph.edges(data=True):
-        label = edge[2].get("label", "")
-        net.add_edge(edge[0], edge[1], label=label)
 
+def pass_networkx_to_pyvis(
+    graph, net: Network, data, node_kind, color=None, image=None
+):
+    """
+    Add the graph's nodes and edges to the pyvis network
 
-g = Graph()
-g.parse(
-    "/home/jlee/.volttron/agents/458aa06c-40ac-4b3f-9390-43dc87ae3f96/grasshopperagent-0.1/grasshopper/webroot/grasshopper/graphs/ttl/test_low.ttl",
-    format="ttl",
-)
-nx_graph, node_data = build_networkx_graph(g)
+    Nodes are colored by kind unless a color is given, and drawn with the image
+    if one is given, as the compare script does for each side of a diff.
+    """
+    image_options = {"image": image} if image else {}
+    shape = "image" if image else "dot"
+    for node in graph.nodes:
+        kind_color, size, title = NODE_STYLES[node_kind[node]]
+        if title is None:
+            title = str(data.get(node, {}))
 
+        net.add_node(
+            node,
+            size=size,
+            title=title,
+            shape=shape,
+            **image_options,
+            data=data.get(node, {}),
+            color=color or kind_color,
+        )
+
+    _log.debug("edges: %d", len(graph.edges))
+    for u, v, label in graph.edges:
+        net.add_edge(u, v, label=label)
+
+
+if __name__ == "__main__":
+    g = Graph()
+    g.parse(
+        "/home/jlee/.volttron/agents/458aa06c-40ac-4b3f-9390-43dc87ae3f96/grasshopperagent-0.1/grasshopper/webroot/grasshopper/graphs/ttl/test_low.ttl",
+        format="ttl",
+    )
+    graph, node_data, node_kind = build_networkx_graph(g)
 
-net = Network(notebook=True, bgcolor="#222222", font_color="white", filter_menu=False)
-pass_networkx_to_pyvis(nx_graph, net, node_data)
-net.show_buttons(filter_=["physics"])
-net.write_html(f"test_low.html")
+    net = Network(
+        notebook=True, bgcolor="#222222", font_color="white", filter_menu=False
+    )
+    pass_networkx_to_pyvis(graph, net, node_data, node_kind)
+    net.show_buttons(filter_=["physics"])
+    net.write_html(f"test_low.html")
@@ -1,5 +1,6 @@
 import json
 import argparse
+import logging
 
 from rdflib import Graph
 from rdflib.extras.external_graph_libs import rdflib_to_networkx_digraph
@@ -7,6 +8,8 @@ from rdflib.namespace import RDFS
 from pyvis.network import Network
 from pyvis.network import Network
 
+_log = logging.getLogger(__name__)
+
 
 def build_networkx_graph(g):
     """
@@ -17,8 +20,7 @@ def build_networkx_graph(g):
     """
     nx_graph = rdflib_to_networkx_digraph(g)
 
-    is_directed = nx_graph.is_directed()
-    print(f"Is the graph directed? {is_directed}")
+    _log.debug("Is the graph directed? %s", nx_graph.is_directed())
 
     remove_nodes = []
     rdf_edges = {}
@@ -1,10 +1,17 @@
 """Tests for Grasshopper agent BACnet scanning functionality"""
 
+import asyncio
 import os
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
 from unittest.mock import MagicMock, patch
 from datetime import datetime
-from rdflib import Graph
+from rdflib import Graph, Literal, URIRef
+
+from grasshopper import agent as agent_module
 
 # Import fixtures
 from tests.agent.conftest import mock_agent, mock_bacpypes3_scanner
@@ -59,4 +66,195 @@ def test_run_async_function_calls(mock_agent):
     mock_agent.run_async_function(async_func, test_graph)
     
     # Verify that the method was called with the right arguments
-    mock_agent.run_async_function.assert_called_once_with(async_func, test_graph)
\ No newline at end of file
+    mock_agent.run_async_function.assert_called_once_with(async_func, test_graph)
+
+def make_scanning_agent(data_dir):
+    """Create an agent with just the state who_is_broadcast needs"""
+    agent = agent_module.Grasshopper.__new__(agent_module.Grasshopper)
+    agent.agent_data_path = data_dir
+    agent.ttl_dir = os.path.join(data_dir, "ttl")
+    os.makedirs(agent.ttl_dir)
+    agent.base_rdf_path = os.path.join(agent.ttl_dir, "base.ttl")
+    agent.device_config_path = os.path.join(data_dir, agent_module.DEVICE_STATE_CONFIG)
+    agent.bacpypes_settings = dict(agent_module.DEFAULT_BACPYPES_SETTINGS)
+    agent.device_broadcast_empty_step_size = 1000
+    agent.device_broadcast_full_step_size = 100
+    agent.low_limit = 0
+    agent.high_limit = 4194303
+    agent.graph_store_limit = None
+    agent.event_loop = None
+    agent.event_loop_thread = None
+    agent.scan_future = None
+    agent._bacnet_app = MagicMock()
+    agent._writer = ThreadPoolExecutor(max_workers=1)
+    agent._graph_cache = OrderedDict()
+    agent._graph_cache_lock = threading.Lock()
+    agent._latest_snapshot = None
+    agent._device_config_cache = None
+    return agent
+
+
+def run_scan(agent, scan):
+    """Start who_is_broadcast with `scan` standing in for the scanner's coroutine"""
+    scanner = MagicMock()
+    scanner.return_value.get_device_and_router = scan
+    with patch.object(agent_module, "bacpypes3_scanner", scanner):
+        agent.who_is_broadcast()
+    return scanner
+
+
+def finish_scan(agent):
+    """Wait for the scan and its done callback, then for any queued write"""
+    try:
+        agent.scan_future.result(timeout=5)
+    except Exception:  # pylint: disable=broad-except
+        pass
+    # Done callbacks run on the loop thread before it picks up the next task
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), agent.event_loop).result(5)
+    agent._writer.shutdown(wait=True)
+
+
+def stop_loop(agent):
+    """Stop the agent's BACnet loop thread"""
+    agent.event_loop.call_soon_threadsafe(agent.event_loop.stop)
+    agent.event_loop_thread.join(timeout=5)
+    agent.event_loop.close()
+
+
+def test_who_is_broadcast_writes_snapshot():
+    """Test that a finished scan is written as a timestamped snapshot"""
+    triple = (URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(1))
+
+    async def scan(graph):
+        graph.add(triple)
+
+    with TemporaryDirectory() as temp_dir:
+        agent = make_scanning_agent(temp_dir)
+        run_scan(agent, scan)
+        finish_scan(agent)
+        stop_loop(agent)
+
+        snapshots = os.listdir(agent.ttl_dir)
+        assert len(snapshots) == 1
+        assert agent_module.is_snapshot_filename(snapshots[0])
+        written = Graph().parse(os.path.join(agent.ttl_dir, snapshots[0]), format="ttl")
+
+    assert set(written) == {triple}
+
+
+def test_who_is_broadcast_skips_while_scan_running(caplog):
+    """Test that a scan isn't started while the previous one is still running"""
+    release = threading.Event()
+
+    async def scan(graph):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+
+    with TemporaryDirectory() as temp_dir:
+        agent = make_scanning_agent(temp_dir)
+        first = run_scan(agent, scan)
+        first_future = agent.scan_future
+        second = run_scan(agent, scan)
+
+        assert agent.scan_future is first_future
+        assert first.call_count == 1
+        assert second.call_count == 0
+        assert "Previous scan still running" in caplog.text
+
+        release.set()
+        finish_scan(agent)
+        stop_loop(agent)
+
+
+def test_who_is_broadcast_logs_failed_scan(caplog):
+    """Test that a failing scan is logged and no snapshot write is queued"""
+
+    async def scan(graph):
+        raise RuntimeError("scan failed")
+
+    with TemporaryDirectory() as temp_dir:
+        agent = make_scanning_agent(temp_dir)
+        writer = agent._writer
+        agent._writer = MagicMock()
+        run_scan(agent, scan)
+        finish_scan(agent)
+        stop_loop(agent)
+        writer.shutdown(wait=True)
+
+        assert os.listdir(agent.ttl_dir) == []
+
+    agent._writer.submit.assert_not_called()
+    assert "Error in who_is_broadcast scan: scan failed" in caplog.text
+
+
+def test_onstop_cancels_running_scan():
+    """Test that onstop lets a running scan unwind before closing the application"""
+    events = []
+
+    async def scan(graph):
+        try:
+            await asyncio.sleep(60)
+        finally:
+            events.append("scan unwound")
+
+    with TemporaryDirectory() as temp_dir:
+        agent = make_scanning_agent(temp_dir)
+        agent._stop_server = MagicMock()
+        agent._bacnet_app.close.side_effect = lambda: events.append("app closed")
+        run_scan(agent, scan)
+        # Let the scan start before stopping the agent
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), agent.event_loop).result(5)
+
+        agent.onstop(None)
+
+    assert agent.scan_future.cancelled()
+    assert events == ["scan unwound", "app closed"]
+    assert not agent.event_loop_thread.is_alive()
+    assert agent.event_loop.is_closed()
+
+
+def test_write_snapshot_skips_unchanged_network():
+    """Test that a graph matching the newest snapshot isn't written again"""
+    graph = Graph()
+    graph.add((URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(1)))
+
+    with TemporaryDirectory() as temp_dir:
+        agent = make_scanning_agent(temp_dir)
+        first_path = os.path.join(agent.ttl_dir, "2024-05-01T09_00_00.ttl")
+        agent._write_snapshot(graph, first_path, agent.ttl_dir, None)
+        latest = agent._latest_snapshot
+
+        same = Graph()
+        same += graph
+        second_path = os.path.join(agent.ttl_dir, "2024-05-01T10_00_00.ttl")
+        agent._write_snapshot(same, second_path, agent.ttl_dir, None)
+
+        assert os.listdir(agent.ttl_dir) == ["2024-05-01T09_00_00.ttl"]
+        assert agent._latest_snapshot == latest
+        agent._writer.shutdown(wait=True)
+
+
+def test_write_snapshot_compares_with_queued_writes():
+    """Test that a network changing A -> B -> A writes all three snapshots"""
+    graph_a = Graph()
+    graph_a.add((URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(1)))
+    graph_b = Graph()
+    graph_b.add((URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(2)))
+
+    with TemporaryDirectory() as temp_dir:
+        agent = make_scanning_agent(temp_dir)
+        names = [f"2024-05-01T{hour:02d}_00_00.ttl" for hour in (9, 10, 11)]
+        # All three are queued before the first one is written, as when the
+        # writer falls behind the scans
+        for graph, name in zip((graph_a, graph_b, graph_a), names):
+            agent._writer.submit(
+                agent._write_snapshot,
+                graph,
+                os.path.join(agent.ttl_dir, name),
+                agent.ttl_dir,
+                None,
+            )
+        agent._writer.shutdown(wait=True)
+
+        assert sorted(os.listdir(agent.ttl_dir)) == names
+        assert agent._find_latest_snapshot(agent.ttl_dir) == names[-1]
@@ -0,0 +1,288 @@
+"""Tests for the module-level helpers in the Grasshopper agent"""
+
+import asyncio
+import json
+import os
+import ssl
+import threading
+from collections import OrderedDict
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from grasshopper import agent as agent_module
+from grasshopper.snapshots import parse_snapshot, same_triples, serialize_snapshot
+
+
+def test_load_config_cached_reuses_parsed_config():
+    """Test that an unchanged config file is only parsed once"""
+    with TemporaryDirectory() as temp_dir:
+        config_path = os.path.join(temp_dir, "config")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({"scan_interval_secs": 60}, f)
+
+        agent_module._config_cache.clear()
+        with patch.object(
+            agent_module.utils, "load_config", return_value={"scan_interval_secs": 60}
+        ) as mock_load:
+            first = agent_module.load_config_cached(config_path)
+            first["scan_interval_secs"] = 0
+            second = agent_module.load_config_cached(config_path)
+
+        # Parsed once, and callers get independent copies
+        mock_load.assert_called_once_with(config_path)
+        assert second == {"scan_interval_secs": 60}
+
+
+def test_load_config_cached_missing_file():
+    """Test that a missing config file falls through to load_config"""
+    agent_module._config_cache.clear()
+    with patch.object(agent_module.utils, "load_config", return_value={}) as mock_load:
+        assert agent_module.load_config_cached("/nonexistent/config") == {}
+
+    mock_load.assert_called_once_with("/nonexistent/config")
+    assert not agent_module._config_cache
+
+
+def test_read_tls12_ciphers_falls_back_on_error():
+    """Test that a failing cipher probe doesn't stop the agent module loading"""
+    assert agent_module.read_tls12_ciphers()
+
+    with patch.object(agent_module.ssl, "SSLContext", side_effect=ssl.SSLError):
+        ciphers = agent_module.read_tls12_ciphers()
+
+    assert ciphers == agent_module.DEFAULT_SSL_CIPHERS
+
+
+def test_serialize_snapshot_round_trip():
+    """Test that a snapshot parses back as Turtle into the original graph"""
+    graph = Graph()
+    graph.add((URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(1)))
+    graph.add((URIRef("urn:example:a"), URIRef("urn:example:c"), Literal("é")))
+
+    with TemporaryDirectory() as temp_dir:
+        rdf_path = os.path.join(temp_dir, "snapshot.ttl")
+        serialize_snapshot(graph, rdf_path)
+        parsed = Graph()
+        parsed.parse(rdf_path, format="ttl")
+        # Written under a temporary name, then moved into place
+        assert os.listdir(temp_dir) == ["snapshot.ttl"]
+
+    assert isomorphic(parsed, graph)
+
+
+def test_parse_snapshot_falls_back_to_turtle():
+    """Test that N-Triples snapshots and prefixed Turtle files parse the same"""
+    graph = Graph()
+    graph.add((URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(1)))
+    graph.add((URIRef("urn:example:c"), URIRef("urn:example:b"), Literal("x")))
+
+    with TemporaryDirectory() as temp_dir:
+        nt_path = os.path.join(temp_dir, "snapshot.ttl")
+        ttl_path = os.path.join(temp_dir, "upload.ttl")
+        serialize_snapshot(graph, nt_path)
+        graph.bind("ex", "urn:example:")
+        graph.serialize(ttl_path, format="ttl")
+
+        assert isomorphic(parse_snapshot(Graph(), nt_path), graph)
+        assert isomorphic(parse_snapshot(Graph(), ttl_path), graph)
+
+        # Triples already in the graph survive both the fast path and the fallback
+        existing = (URIRef("urn:example:z"), URIRef("urn:example:b"), Literal(0))
+        for path in (nt_path, ttl_path):
+            target = Graph()
+            target.add(existing)
+            parsed = parse_snapshot(target, path)
+            assert parsed is target
+            assert existing in parsed
+            assert len(parsed) == len(graph) + 1
+
+
+def test_load_graph_reuses_unchanged_files():
+    """Test that TTL files are only parsed again once they change"""
+    agent = agent_module.Grasshopper.__new__(agent_module.Grasshopper)
+    agent._graph_cache = OrderedDict()
+    agent._graph_cache_lock = threading.Lock()
+
+    with TemporaryDirectory() as temp_dir:
+        rdf_path = os.path.join(temp_dir, "base.ttl")
+        with open(rdf_path, "w", encoding="utf-8") as f:
+            f.write("<urn:example:a> <urn:example:b> <urn:example:c> .\n")
+
+        first = agent._load_graph(rdf_path)
+        assert agent._load_graph(rdf_path) is first
+
+        with open(rdf_path, "a", encoding="utf-8") as f:
+            f.write("<urn:example:a> <urn:example:b> <urn:example:d> .\n")
+        second = agent._load_graph(rdf_path)
+
+    assert second is not first
+    assert len(second) == 2
+
+
+def test_device_config_read_key_reuses_unchanged_file():
+    """Test that the device config is only parsed again once it changes"""
+    agent = agent_module.Grasshopper.__new__(agent_module.Grasshopper)
+    agent._device_config_cache = None
+
+    with TemporaryDirectory() as temp_dir:
+        config_path = os.path.join(temp_dir, agent_module.DEVICE_STATE_CONFIG)
+        agent.device_config_path = config_path
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({"bbmd_devices": ["10.0.0.1"], "subnets": []}, f)
+
+        with patch.object(agent_module.json, "load", wraps=json.load) as mock_load:
+            bbmds = agent._device_config_read_key("bbmd_devices")
+            bbmds.append("10.0.0.2")
+            assert agent._device_config_read_key("subnets") == []
+            assert agent._device_config_read_key("bbmd_devices") == ["10.0.0.1"]
+            assert mock_load.call_count == 1
+
+            with open(config_path, "w", encoding="utf-8") as f:
+                json.dump({"bbmd_devices": [], "subnets": ["10.0.1.0/24"]}, f)
+            assert agent._device_config_read_key("subnets") == ["10.0.1.0/24"]
+            assert mock_load.call_count == 2
+
+        assert agent._device_config_read_key("missing") is None
+
+
+def test_prune_snapshots_keeps_newest():
+    """Test that only the oldest timestamped snapshots beyond the limit are deleted"""
+    limit = 3
+    # Older ":" separated names sort with the newer "_" ones
+    snapshots = [
+        "2024-05-01T09:00:00.ttl",
+        "2024-05-01T10_00_00.ttl",
+        "2024-05-01T11:00:00.ttl",
+        "2024-05-01T12_00_00.ttl",
+        "2024-05-01T13_00_00.ttl",
+    ]
+    others = ["base.ttl", "site-upload.ttl"]
+
+    with TemporaryDirectory() as temp_dir:
+        for filename in snapshots + others:
+            with open(os.path.join(temp_dir, filename), "w", encoding="utf-8") as f:
+                f.write("")
+
+        agent_module.prune_snapshots(temp_dir, limit)
+        remaining = sorted(os.listdir(temp_dir))
+
+    assert len(snapshots) == limit + 2
+    assert remaining == sorted(snapshots[2:] + others)
+
+
+def test_same_triples():
+    """Test that graphs only match when they hold exactly the same triples"""
+    triple = (URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(1))
+    graph = Graph()
+    graph.add(triple)
+    other = Graph()
+    other.add(triple)
+
+    assert same_triples(graph, other)
+    other.add((URIRef("urn:example:a"), URIRef("urn:example:b"), Literal(2)))
+    assert not same_triples(graph, other)
+    graph.add((URIRef("urn:example:a"), URIRef("urn:example:b"), Literal("2")))
+    assert not same_triples(graph, other)
+
+
+def test_same_triples_with_blank_nodes():
+    """Test that blank node ids from separate parses don't make graphs differ"""
+    turtle = "<urn:example:a> <urn:example:b> [ <urn:example:c> %d ] ."
+
+    graph = Graph().parse(data=turtle % 1, format="ttl")
+    assert same_triples(graph, Graph().parse(data=turtle % 1, format="ttl"))
+    assert not same_triples(graph, Graph().parse(data=turtle % 2, format="ttl"))
+
+
+def make_configurable_agent():
+    """Create an agent with just the state configure needs and a mocked server"""
+    agent = agent_module.Grasshopper.__new__(agent_module.Grasshopper)
+    agent.core = MagicMock()
+    agent.default_config = {}
+    agent.applied_config = None
+    agent.scan_interval_secs = 60
+    agent.bacnet_analysis = None
+    agent.vendor_info = None
+    agent.http_server_process = None
+    agent.webapp_settings = dict(agent_module.DEFAULT_WEBAPP_SETTINGS)
+    agent.bacpypes_settings = dict(agent_module.DEFAULT_BACPYPES_SETTINGS)
+    agent.event_loop = None
+    agent._bacnet_app = MagicMock()
+    agent._stop_server = MagicMock()
+
+    def start_server():
+        agent.http_server_process = MagicMock()
+
+    agent.configure_server_and_start = MagicMock(side_effect=start_server)
+    return agent
+
+
+def test_configure_restarts_server_only_for_webapp_changes():
+    """Test that only web app setting changes restart the web server"""
+    agent = make_configurable_agent()
+
+    agent.configure("config", "NEW", {"scan_interval_secs": 60})
+    agent.configure("config", "UPDATE", {"scan_interval_secs": 60, "low_limit": 5})
+    assert agent.configure_server_and_start.call_count == 1
+
+    webapp_settings = dict(agent_module.DEFAULT_WEBAPP_SETTINGS, port=5001)
+    agent.configure(
+        "config",
+        "UPDATE",
+        {"scan_interval_secs": 60, "webapp_settings": webapp_settings},
+    )
+    assert agent.configure_server_and_start.call_count == 2
+    assert agent._stop_server.call_count == 2
+
+
+def test_configure_reuses_registered_vendor():
+    """Test that reapplying a vendor identifier doesn't register it again"""
+    settings = dict(agent_module.DEFAULT_BACPYPES_SETTINGS, vendoridentifier=4242)
+
+    agent = make_configurable_agent()
+    agent.configure("config", "NEW", {"bacpypes_settings": settings})
+    vendor_info = agent.vendor_info
+    agent.configure("config", "UPDATE", {"bacpypes_settings": settings, "low_limit": 5})
+
+    # A second agent in the same process finds the vendor already registered
+    other = make_configurable_agent()
+    other.configure("config", "NEW", {"bacpypes_settings": settings})
+
+    assert vendor_info.vendor_identifier == 4242
+    assert agent.vendor_info is vendor_info
+    assert other.vendor_info is vendor_info
+
+
+def test_configure_closes_application_for_bacpypes_changes():
+    """Test that changed bacpypes settings close the cached application on its loop"""
+    agent = make_configurable_agent()
+    agent.event_loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=agent.event_loop.run_forever, daemon=True)
+    loop_thread.start()
+
+    def wait_for_loop():
+        for _ in range(3):
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), agent.event_loop).result(
+                timeout=5
+            )
+
+    try:
+        settings = dict(agent_module.DEFAULT_BACPYPES_SETTINGS)
+        agent.configure("config", "NEW", {"bacpypes_settings": settings})
+        agent.configure(
+            "config", "UPDATE", {"bacpypes_settings": settings, "low_limit": 5}
+        )
+        wait_for_loop()
+        agent._bacnet_app.close.assert_not_called()
+
+        settings = dict(settings, address="10.0.0.5/24:47808")
+        agent.configure("config", "UPDATE", {"bacpypes_settings": settings})
+        wait_for_loop()
+        agent._bacnet_app.close.assert_called_once()
+    finally:
+        agent.event_loop.call_soon_threadsafe(agent.event_loop.stop)
+        loop_thread.join(timeout=5)
+        agent.event_loop.close()
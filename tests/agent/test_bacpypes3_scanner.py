@@ -0,0 +1,177 @@
+"""Tests for the bacpypes3 scanner's Who-Is range planning"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from bacpypes3.rdf.core import BACnetNS, BACnetURI
+from bacpypes3.ipv4.service import BVLLServiceAccessPoint
+from rdflib import RDF, Graph, Literal
+
+from grasshopper import bacpypes3_scanner as scanner_module
+from grasshopper.bacpypes3_scanner import BACnetApplicationCache, bacpypes3_scanner
+
+BACPYPES_SETTINGS = {
+    "name": "TestDevice",
+    "instance": 999,
+    "network": 0,
+    "address": "127.0.0.1/24:47808",
+    "vendoridentifier": 999,
+    "foreign": None,
+    "ttl": 30,
+    "bbmd": None,
+}
+
+
+def make_scanner(prev_graph, low_limit=0, high_limit=100, empty_step=20, full_step=3):
+    """Create a scanner with the given previous graph and range settings"""
+    return bacpypes3_scanner(
+        BACPYPES_SETTINGS,
+        prev_graph,
+        [],
+        [],
+        device_broadcast_empty_step_size=empty_step,
+        device_broadcast_full_step_size=full_step,
+        scan_low_limit=low_limit,
+        scan_high_limit=high_limit,
+    )
+
+
+def test_who_is_ranges_empty_graph():
+    """Test that an empty previous graph yields evenly sized ranges"""
+    scanner = make_scanner(Graph(), high_limit=50)
+    assert scanner.get_who_is_ranges() == [(0, 20), (21, 41), (42, 50)]
+
+
+def test_who_is_ranges_shrink_around_known_devices():
+    """Test that ranges are cut short once they cover enough known devices"""
+    prev_graph = Graph()
+    for instance in (5, 6, 7, 8, 30):
+        prev_graph.add((BACnetURI["//" + str(instance)], RDF.type, Literal("Device")))
+    # Non-device subjects are ignored
+    prev_graph.add((BACnetURI["//router/10.0.0.1"], RDF.type, Literal("Router")))
+
+    scanner = make_scanner(prev_graph, high_limit=50)
+    assert scanner.get_who_is_ranges() == [(0, 7), (8, 28), (29, 49), (50, 50)]
+
+
+def test_get_device_objects_skips_duplicate_i_ams():
+    """Test that a device answering overlapping Who-Is ranges is only probed once"""
+    i_am = MagicMock()
+    i_am.pduSource = "10.0.0.10"
+    i_am.iAmDeviceIdentifier = ("device", 10)
+    i_am.vendorID = 7
+
+    app = MagicMock()
+    app.who_is = AsyncMock(return_value=[i_am, i_am])
+
+    scanner = make_scanner(Graph(), high_limit=50)
+    scanner.check_if_device_is_bbmd = AsyncMock(return_value=False)
+    scanner.add_subnet_to_device = AsyncMock(return_value=None)
+
+    graph = Graph()
+    asyncio.run(scanner.get_device_objects(app, MagicMock(), graph))
+
+    scanner.check_if_device_is_bbmd.assert_awaited_once()
+    scanner.add_subnet_to_device.assert_awaited_once()
+    assert (BACnetURI["//10"], BACnetNS["device-instance"], Literal(10)) in graph
+
+
+def test_get_device_objects_probes_bbmds_concurrently():
+    """Test that BDT probes for different devices overlap instead of running in turn"""
+    i_ams = []
+    for instance, address in ((10, "10.0.0.10"), (11, "10.0.0.11")):
+        i_am = MagicMock()
+        i_am.pduSource = address
+        i_am.iAmDeviceIdentifier = ("device", instance)
+        i_am.vendorID = 7
+        i_ams.append(i_am)
+
+    app = MagicMock()
+    app.who_is = AsyncMock(return_value=i_ams)
+
+    in_flight = []
+    peak = []
+
+    async def check_if_device_is_bbmd(ase, device_address):
+        in_flight.append(device_address)
+        await asyncio.sleep(0)
+        peak.append(len(in_flight))
+        in_flight.remove(device_address)
+        return device_address == "10.0.0.10"
+
+    scanner = make_scanner(Graph(), high_limit=5)
+    scanner.check_if_device_is_bbmd = check_if_device_is_bbmd
+    scanner.add_subnet_to_device = AsyncMock(return_value=None)
+
+    graph = Graph()
+    asyncio.run(scanner.get_device_objects(app, MagicMock(), graph))
+
+    assert max(peak) == 2
+    assert (BACnetURI["//10"], RDF.type, BACnetNS.BBMD) in graph
+    assert (BACnetURI["//11"], RDF.type, BACnetNS.Device) in graph
+
+
+def test_read_bbmd_fdts_overlaps_reads():
+    """Test that FDT reads for the configured BBMDs overlap instead of running in turn"""
+    in_flight = []
+    peak = []
+
+    async def read_bbmd_fdt(ase, device_address):
+        in_flight.append(device_address)
+        await asyncio.sleep(0)
+        peak.append(len(in_flight))
+        in_flight.remove(device_address)
+
+    scanner = bacpypes3_scanner(
+        BACPYPES_SETTINGS, Graph(), ["10.0.0.1", "10.0.1.1", "10.0.2.1"], []
+    )
+    scanner.read_bbmd_fdt = read_bbmd_fdt
+
+    asyncio.run(scanner.read_bbmd_fdts(MagicMock()))
+
+    assert len(peak) == 3
+    assert max(peak) == 3
+
+
+def test_application_cache_is_shared_by_its_scanners():
+    """Test that scanners given the same cache reuse one application per loop"""
+
+    def from_args(app_settings):
+        app = MagicMock()
+        app.nsap.local_adapter.clientPeer = MagicMock(spec=BVLLServiceAccessPoint)
+        return app
+
+    async def build_twice(app_cache):
+        first = make_scanner(Graph())
+        first.app_cache = app_cache
+        second = make_scanner(Graph())
+        second.app_cache = app_cache
+        return await first.set_application(Graph()), await second.set_application(
+            Graph()
+        )
+
+    app_cache = BACnetApplicationCache()
+    # Both loops stay referenced, so the id of one can't be reused by the other
+    loop, other_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        with (
+            patch.object(
+                scanner_module.Application, "from_args", side_effect=from_args
+            ) as mock_from_args,
+            patch.object(scanner_module, "bind"),
+        ):
+            first, second = loop.run_until_complete(build_twice(app_cache))
+            assert first is second
+            assert mock_from_args.call_count == 1
+
+            # Another loop gets a new application, and the old one is closed
+            third, _ = other_loop.run_until_complete(build_twice(app_cache))
+            assert third is not first
+            assert mock_from_args.call_count == 2
+            first.close.assert_called_once()
+    finally:
+        loop.close()
+        other_loop.close()
+
+    # Scanners without a cache don't share one
+    assert make_scanner(Graph()).app_cache is not make_scanner(Graph()).app_cache
@@ -38,3 +38,68 @@ def test_get_ttl_list_with_files(api_client):
     response = client.get("/operations/ttl")
     assert response.status_code == 200
     assert set(response.json()["data"]) == {"test1.ttl", "test2.ttl"}
+
+
+def test_get_ttl_list_newest_first(api_client):
+    """Test that the TTL listing is ordered newest first by modification time"""
+    client, temp_dir = api_client
+
+    ttl_dir = os.path.join(temp_dir, "ttl")
+    for age, file_name in enumerate(["newest.ttl", "middle.ttl", "oldest.ttl"]):
+        file_path = os.path.join(ttl_dir, file_name)
+        with open(file_path, "w") as f:
+            f.write("test content")
+        os.utime(file_path, (1_700_000_000 - age, 1_700_000_000 - age))
+
+    response = client.get("/operations/ttl")
+    assert response.json()["data"] == ["newest.ttl", "middle.ttl", "oldest.ttl"]
+
+
+def test_list_dir_cached_skips_recently_modified_dirs(api_client):
+    """Test that a listing is only cached once the directory mtime is settled"""
+    from Grasshopper.grasshopper import api
+
+    _, temp_dir = api_client
+    ttl_dir = os.path.join(temp_dir, "ttl")
+    with open(os.path.join(ttl_dir, "scan.ttl"), "w") as f:
+        f.write("test content")
+
+    api._listdir_cache.clear()
+    assert api.list_dir_cached(ttl_dir, ".ttl") == ["scan.ttl"]
+    assert not api._listdir_cache
+
+    os.utime(ttl_dir, (1_700_000_000, 1_700_000_000))
+    assert api.list_dir_cached(ttl_dir, ".ttl") == ["scan.ttl"]
+    assert (ttl_dir, ".ttl") in api._listdir_cache
+
+
+def test_get_ttl_compare_list_newest_first(api_client):
+    """Test that the compare listing skips directories and is ordered newest first"""
+    client, temp_dir = api_client
+
+    compare_dir = os.path.join(temp_dir, "compare")
+    os.makedirs(os.path.join(compare_dir, "subdir"))
+    for age, file_name in enumerate(["newest.ttl", "oldest.ttl"]):
+        file_path = os.path.join(compare_dir, file_name)
+        with open(file_path, "w") as f:
+            f.write("test content")
+        os.utime(file_path, (1_700_000_000 - age, 1_700_000_000 - age))
+
+    response = client.get("/operations/ttl_compare")
+    assert response.json()["file_list"] == ["newest.ttl", "oldest.ttl"]
+
+
+def test_get_ttl_list_refreshes_after_upload(api_client):
+    """Test that the cached TTL listing picks up newly uploaded files"""
+    client, _ = api_client
+
+    assert client.get("/operations/ttl").json() == {"data": []}
+
+    response = client.post(
+        "/operations/ttl",
+        files={"file": ("new_scan.ttl", "test content", "application/octet-stream")},
+    )
+    assert response.status_code == 201
+
+    response = client.get("/operations/ttl")
+    assert response.json() == {"data": ["new_scan.ttl"]}
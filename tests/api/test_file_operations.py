@@ -139,3 +139,99 @@ def test_get_ttl_network(
     mock_build_graph.assert_called_once()
     mock_network.assert_called_once()
     mock_pass_network.assert_called_once()
+
+
+@patch("Grasshopper.grasshopper.api.Graph")
+@patch("Grasshopper.grasshopper.api.build_networkx_graph")
+@patch("Grasshopper.grasshopper.api.Network")
+@patch("Grasshopper.grasshopper.api.pass_networkx_to_pyvis")
+def test_get_ttl_network_cached(
+    mock_pass_network, mock_network, mock_build_graph, mock_graph, api_client
+):
+    """Test that an unchanged TTL file is only parsed and rendered once"""
+    client, temp_dir = api_client
+
+    mock_network_instance = MagicMock()
+    mock_network.return_value = mock_network_instance
+    mock_network_instance.nodes = [{"id": 1, "label": "test"}]
+    mock_network_instance.edges = []
+    mock_build_graph.return_value = (MagicMock(), {}, {})
+
+    test_filename = "test_network_cached.ttl"
+    file_path = os.path.join(temp_dir, "ttl", test_filename)
+    with open(file_path, "w") as f:
+        f.write("test ttl content")
+
+    for _ in range(2):
+        response = client.get(f"/operations/ttl_network/{test_filename}")
+        assert response.status_code == 200
+        assert response.json()["nodes"] == [{"id": 1, "label": "test"}]
+
+    mock_graph.return_value.parse.assert_called_once()
+    mock_build_graph.assert_called_once()
+
+    # Rewriting the file invalidates the cached network
+    with open(file_path, "w") as f:
+        f.write("updated ttl content")
+    client.get(f"/operations/ttl_network/{test_filename}")
+    assert mock_build_graph.call_count == 2
+
+
+def test_load_canonical_graph_cached(api_client):
+    """Test that the compare worker reuses canonicalized graphs until a file changes"""
+    from Grasshopper.grasshopper import api
+
+    _, temp_dir = api_client
+    file_path = os.path.join(temp_dir, "ttl", "test_canonical.ttl")
+    with open(file_path, "w") as f:
+        f.write("<urn:a> <urn:b> <urn:c> .\n")
+
+    api._canonical_cache.clear()
+    first = api.load_canonical_graph(file_path)
+    assert api.load_canonical_graph(file_path) is first
+    assert len(first) == 1
+
+    # Rewriting the file invalidates the cached graph
+    with open(file_path, "w") as f:
+        f.write("<urn:a> <urn:b> <urn:c> .\n<urn:a> <urn:b> <urn:d> .\n")
+    second = api.load_canonical_graph(file_path)
+    assert second is not first
+    assert len(second) == 2
+
+
+def test_build_networkx_graph_drops_property_nodes():
+    """Test that property values become node data rather than graph nodes"""
+    from rdflib import Graph, Literal, URIRef
+
+    from Grasshopper.grasshopper import api
+
+    bacnet = "http://data.ashrae.org/bacnet/2020#"
+    device = URIRef("bacnet://10")
+    network = URIRef("bacnet://network/1")
+    g = Graph()
+    g.add((device, URIRef(bacnet + "device-on-network"), network))
+    g.add((device, URIRef(bacnet + "vendor-id"), Literal(5)))
+
+    graph, node_data, edge_data = api.build_networkx_graph(g)
+
+    assert set(graph.nodes) == {device, network}
+    assert graph.edges == [(device, network, URIRef(bacnet + "device-on-network"))]
+    assert node_data == {str(device): {"vendor-id": "5"}}
+    assert edge_data == {}
+
+
+def test_pass_networkx_to_pyvis_drops_reverse_edges():
+    """Test that undirected networks keep only the first edge of a reverse pair"""
+    from pyvis.network import Network
+
+    from Grasshopper.grasshopper import api
+
+    graph = api.NetworkGraph(
+        nodes=["a", "b"], edges=[("a", "b", "first"), ("b", "a", "second")]
+    )
+    net = Network()
+    api.pass_networkx_to_pyvis(graph, net, {"a": {"type": "Device"}}, {})
+
+    assert [node["id"] for node in net.nodes] == ["a", "b"]
+    assert net.nodes[0]["data"] == {"type": "Device"}
+    assert net.edges == [{"label": "first", "data": {}, "from": "a", "to": "b"}]
@@ -6,7 +6,7 @@ import pytest
 from fastapi.testclient import TestClient
 from tempfile import TemporaryDirectory
 from fastapi import FastAPI
-from multiprocessing import Queue
+from multiprocessing import SimpleQueue
 
 from Grasshopper.grasshopper.api import api_router
 
@@ -27,8 +27,8 @@ def api_client():
         os.makedirs(os.path.join(temp_dir, "network_config"), exist_ok=True)
         
         # Set up the task queues in app state
-        app.state.task_queue = Queue()
-        app.state.processing_task_queue = Queue()
+        app.state.task_queue = SimpleQueue()
+        app.state.processing_task_queue = SimpleQueue()
         
         # Set app state in both locations used by the code
         app.extra = {"agent_data_path": temp_dir}